@@ -1,6 +1,6 @@
 from typing import List, Dict, Any
 from langchain_core.documents import Document
-from keybert import KeyBERT
+from db.model_registry import get_keybert
 import yake
 import re
 
@@ -15,7 +15,8 @@ class ConceptExtractionAgent:
             top=max_keywords
         )
 
-        self.keybert_model = KeyBERT(model_name)
+        # Shared with chroma_manager / other agents instead of loading another copy
+        self.keybert_model = get_keybert(model_name)
 
     def clean_text(self, text: str) -> str:
         text = re.sub(r"\s+", " ", text).strip()
@@ -1,7 +1,7 @@
 from langchain_community.document_loaders import WebBaseLoader, TextLoader, PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_experimental.text_splitter import SemanticChunker
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from db.model_registry import get_embeddings
 from langchain_core.documents import Document
 from typing import Dict, Any, Union, List
 from langchain_community.document_loaders import AsyncChromiumLoader
@@ -14,7 +14,7 @@ class IngestionAgent:
         self.use_semantic = use_semantic
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2") if self.use_semantic else None
+        self.embedding_model = get_embeddings("all-MiniLM-L6-v2") if self.use_semantic else None
 
 
     def load_content(self, sources: Union[str, os.PathLike, list]) -> str:
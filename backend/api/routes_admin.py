@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Query
+from db.chroma_manager import rebuild_related_notes
+from db.reindex import REINDEX_BATCH_CHUNKS, REINDEX_WORKERS, get_reindex_status, start_reindex
+from db.vector_sync import get_sync_status, sweep_orphans, sync_outbox
+from typing import Dict, Any
+
+router = APIRouter()
+
+@router.post("/reindex", status_code=202)
+def trigger_reindex(
+    restart: bool = False,
+    workers: int = Query(REINDEX_WORKERS, ge=1, le=32),
+    batch_chunks: int = Query(REINDEX_BATCH_CHUNKS, ge=1, le=4096),
+) -> Dict[str, Any]:
+    """
+    Rebuild the vector index from every note in the background. Resumes from the
+    last checkpoint unless `restart` is set or the model/splitter settings changed.
+    """
+    if not start_reindex(batch_chunks=batch_chunks, workers=workers, restart=restart):
+        raise HTTPException(status_code=409, detail="A re-index is already running")
+    return {"status": "started"}
+
+@router.get("/reindex")
+def reindex_status() -> Dict[str, Any]:
+    """Progress (notes done, chunks/sec) of the current run and the last checkpoint."""
+    return get_reindex_status()
+
+@router.post("/sweep")
+def sweep_vectors() -> Dict[str, Any]:
+    """Apply pending note changes, then delete orphaned vectors; reports how many were reclaimed."""
+    synced = sync_outbox()
+    return {"synced": synced, **sweep_orphans()}
+
+@router.post("/related")
+def rebuild_related() -> Dict[str, Any]:
+    """Recompute pooled note embeddings and the related-notes graph from the stored chunk vectors."""
+    return {"notes": rebuild_related_notes()}
+
+@router.get("/sync")
+def sync_status() -> Dict[str, Any]:
+    """Pending outbox entries and the result of the last orphan sweep."""
+    return get_sync_status()
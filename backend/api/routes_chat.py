@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Body
 from google import genai
-from db.chroma_manager import search_notes, search_within_note
+from db.chroma_manager import hybrid_search, search_within_note
 
 router = APIRouter()
 client = genai.Client(api_key="AIz...k")
@@ -8,7 +8,9 @@ client = genai.Client(api_key="AIz...k")
 @router.post("/global")
 def chat_global(query: str = Body(..., embed=True)):
     """Chat across all notes"""
-    retrieved = search_notes(query)
+    # BM25 + vector retrieval fused per note, at most two chunks from each
+    hits = hybrid_search(query, k=5)
+    retrieved = [doc for hit in hits for doc in hit["documents"][:2]]
     context = "\n\n".join([r.page_content for r in retrieved])
 
     prompt = f"""
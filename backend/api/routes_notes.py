@@ -1,18 +1,197 @@
-from fastapi import APIRouter
-from db.database_manager import get_all_notes, get_note_by_id, delete_note
-from typing import Dict, Any
+import json
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from db.chroma_manager import index_notes_in_chroma
+from db.related_notes import RELATED_NOTES_K
+from db.vector_sync import sync_outbox
+from db.database_manager import (
+    get_notes_page,
+    get_note_by_id,
+    delete_note,
+    search_notes_fulltext,
+    get_facet_counts,
+    iter_notes,
+    add_notes_bulk,
+    get_notes_by_ids,
+    update_indexing_status,
+    get_note_revisions,
+    get_note_revision,
+    get_related_notes,
+    get_existing_note_ids,
+)
+from typing import Dict, Any, List, Optional
 
 router = APIRouter()
 
+IMPORT_BATCH_SIZE = 500
+
 @router.get("/", response_model=list[Dict[str, Any]])
-def fetch_notes():
-    return get_all_notes()
+def fetch_notes(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    tag: Optional[List[str]] = Query(None),
+    concept: Optional[List[str]] = Query(None),
+    match: str = Query("all", pattern="^(all|any)$"),
+):
+    """
+    List notes, newest first.
+    `limit`/`cursor` page through the notes (the next cursor is returned in the
+    X-Next-Cursor header), `fields` is a comma-separated projection,
+    e.g. fields=id,title,excerpt,tags. Repeat `tag`/`concept` to filter by them
+    (`match=all` or `any`). Without parameters all notes are returned.
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        notes, next_cursor = get_notes_page(
+            limit=limit,
+            cursor=cursor,
+            fields=field_list,
+            tags=tag,
+            concepts=concept,
+            match_all=(match == "all"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
+
+@router.get("/search", response_model=list[Dict[str, Any]])
+def keyword_search_notes(
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = False,
+):
+    """
+    BM25-ranked keyword search with highlighted snippets.
+    Supports "quoted phrases" and term* prefixes; prefix=true also treats the
+    last term as a prefix (search-as-you-type).
+    """
+    return search_notes_fulltext(q, limit=limit, prefix=prefix)
+
+@router.get("/facets", response_model=list[Dict[str, Any]])
+def fetch_facets(
+    field: str = Query("tags", pattern="^(tags|concepts)$"),
+    tag: Optional[List[str]] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Note counts per tag (or concept), optionally within notes carrying all given `tag`s."""
+    return get_facet_counts(field=field, tags=tag, limit=limit)
+
+@router.get("/export")
+def export_notes():
+    """Stream every note as NDJSON (one JSON object per line) read in keyset pages."""
+    def ndjson():
+        for note in iter_notes():
+            yield json.dumps(note, default=str) + "\n"
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=notes.ndjson"},
+    )
+
+def reindex_imported_notes(note_ids: List[int]):
+    """Background task: index one imported batch in Chroma and mark it completed."""
+    notes = get_notes_by_ids(note_ids)
+    index_notes_in_chroma(notes)
+    update_indexing_status([note["id"] for note in notes], "completed")
+
+@router.post("/import")
+async def import_notes(request: Request, background_tasks: BackgroundTasks):
+    """
+    Import notes from an NDJSON request body (the /notes/export format).
+    Lines are inserted in batched transactions; each batch is queued for
+    Chroma indexing as a single background task. A malformed line stops the
+    import with a 400; batches committed before it are indexed first.
+    """
+    imported, batches = 0, 0
+    batch, buffer, line_no = [], b"", 0
+    committed: List[List[int]] = []
+
+    def parse_line(line: bytes) -> Dict[str, Any]:
+        try:
+            note = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid JSON on line {line_no} ({imported} notes already imported): {e}",
+            )
+        if not isinstance(note, dict):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Line {line_no} is not a JSON object ({imported} notes already imported).",
+            )
+        return note
+
+    async def flush():
+        nonlocal imported, batches, batch
+        note_ids = await run_in_threadpool(add_notes_bulk, batch)
+        background_tasks.add_task(reindex_imported_notes, note_ids)
+        committed.append(note_ids)
+        imported += len(note_ids)
+        batches += 1
+        batch = []
+
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                if not line.strip():
+                    continue
+                batch.append(parse_line(line))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await flush()
+
+        if buffer.strip():
+            line_no += 1
+            batch.append(parse_line(buffer))
+    except HTTPException:
+        # An error response drops its background tasks: don't leave committed notes pending
+        for note_ids in committed:
+            await run_in_threadpool(reindex_imported_notes, note_ids)
+        raise
+    if batch:
+        await flush()
+
+    return {"imported": imported, "reindex_batches": batches}
 
 @router.get("/{note_id}", response_model=Dict[str, Any])
 def fetch_note_by_id(note_id: int):
     return get_note_by_id(note_id)
 
+@router.get("/{note_id}/revisions", response_model=list[Dict[str, Any]])
+def fetch_note_revisions(note_id: int):
+    """List the stored revisions of a note, oldest first."""
+    return get_note_revisions(note_id)
+
+@router.get("/{note_id}/revisions/{revision}", response_model=Dict[str, Any])
+def fetch_note_revision(note_id: int, revision: int):
+    """Reconstruct a note's title/content/rewritten_notes as of a given revision."""
+    doc = get_note_revision(note_id, revision)
+    if doc is None:
+        raise HTTPException(status_code=404, detail=f"Revision {revision} of note {note_id} not found.")
+    return doc
+
+@router.get("/{note_id}/related", response_model=list[Dict[str, Any]])
+def fetch_related_notes(note_id: int, k: int = Query(RELATED_NOTES_K, ge=1, le=RELATED_NOTES_K)):
+    """
+    The `k` notes most similar to this one (cosine similarity of pooled note
+    embeddings), read from the precomputed related-notes graph.
+    """
+    if not get_existing_note_ids([note_id]):
+        raise HTTPException(status_code=404, detail=f"Note {note_id} not found.")
+    return get_related_notes(note_id, limit=k)
+
 @router.delete("/{note_id}")
-def remove_note(note_id: int):
+def remove_note(note_id: int, background_tasks: BackgroundTasks):
     delete_note(note_id)
+    # the delete trigger queued the note's vectors for removal; apply it right away
+    background_tasks.add_task(sync_outbox)
     return {"message": f"Note {note_id} deleted successfully."}
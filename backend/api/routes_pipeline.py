@@ -7,7 +7,7 @@ from agents.StyleLearnerAgent import StyleLearnerAgent
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
-from db.database_manager import update_style_profiles  
+from db.database_manager import update_style_profiles, patch_style_profile
 from google import genai
  
 router = APIRouter()
@@ -170,7 +170,14 @@ async def learn_style_from_input(
     new_profile["updated_at"] = datetime.now().isoformat()
 
     try:
-        update_style_profiles([new_profile])
+        if new_profile.get("profile_id"):
+            # Only rewrite the learned sections of this profile
+            patch_style_profile(
+                new_profile["profile_id"],
+                {**learned_json, "updated_at": new_profile["updated_at"]},
+            )
+        else:
+            update_style_profiles([new_profile])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save profile: {e}")
 
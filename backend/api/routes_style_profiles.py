@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Body, HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from db.database_manager import (
     get_style_profiles,
+    get_style_profile,
     save_style_profiles,
-    update_style_profiles
+    update_style_profiles,
+    patch_style_profile,
+    delete_style_profiles,
 )
 
 router = APIRouter()
@@ -45,13 +48,43 @@ def update_style_profiles_api(style_data: List[Dict[str, Any]] = Body(...)):
         raise HTTPException(status_code=500, detail=f"Failed to update profiles: {e}")
 
 @router.delete("/", response_model=Dict[str, str])
-def delete_style_profiles():
+def delete_style_profiles_api():
     """
     Delete all style profiles (use cautiously).
     """
-    from db.database_manager import delete_style_profiles  # optional if implemented
     try:
         delete_style_profiles()
         return {"message": "All style profiles deleted."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete profiles: {e}")
+
+
+@router.get("/{profile_id}", response_model=Dict[str, Any])
+def fetch_style_profile(profile_id: str):
+    """
+    Fetch a single style profile by its profile_id.
+    The response carries the profile's current `version`.
+    """
+    profile = get_style_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Style profile '{profile_id}' not found.")
+    return profile
+
+@router.patch("/{profile_id}", response_model=Dict[str, Any])
+def patch_style_profile_api(
+    profile_id: str,
+    patch: Dict[str, Any] = Body(...),
+    version: Optional[int] = None,
+):
+    """
+    Partially update one style profile with a JSON merge patch, e.g.
+    {"tone": {"formality": "casual"}}. Pass `version` to reject the update
+    (409) if the profile changed since it was read.
+    """
+    try:
+        profile = patch_style_profile(profile_id, patch, expected_version=version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Style profile '{profile_id}' not found.")
+    return profile
@@ -0,0 +1,94 @@
+"""
+Mixed read/write throughput: connect-per-call (old behaviour) vs the pooled WAL layer.
+
+Run from ./backend:
+    python -m benchmarks.bench_db_pool
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+import db.database_manager as dbm
+
+THREADS = 8
+OPS_PER_THREAD = 300
+WRITE_RATIO = 0.2
+
+
+def _legacy_add(title, content):
+    conn = sqlite3.connect(dbm.DB_PATH)
+    dbm.codec.register(conn)  # the notes triggers call note_text()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO notes (title, input_source, content) VALUES (?, ?, ?)", (title, "bench", content))
+    conn.commit()
+    conn.close()
+
+
+def _legacy_get(note_id):
+    conn = sqlite3.connect(dbm.DB_PATH)
+    row = conn.execute("SELECT * FROM notes WHERE id=?", (note_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def _pooled_add(title, content):
+    dbm.add_note(title=title, input_source="bench", content=content)
+
+
+def _pooled_get(note_id):
+    return dbm.get_note_by_id(note_id)
+
+
+def _run(add, get):
+    errors = []
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        for i in range(OPS_PER_THREAD):
+            try:
+                if rnd.random() < WRITE_RATIO:
+                    add(f"note {seed}-{i}", "lorem ipsum " * 200)
+                else:
+                    get(rnd.randint(1, 200))
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return THREADS * OPS_PER_THREAD / elapsed, len(errors)
+
+
+def _fresh_db(tmpdir, name, wal):
+    dbm.DB_PATH = os.path.join(tmpdir, name)
+    if not wal:
+        # Build the schema without touching the pool so the file stays in rollback-journal mode
+        conn = sqlite3.connect(dbm.DB_PATH)
+        conn.close()
+        pool = dbm.SQLitePool(dbm.DB_PATH, pragmas={}, on_connect=dbm._on_connect)
+        dbm._pool = pool
+    dbm.init_db()
+    for i in range(200):
+        dbm.add_note(title=f"seed {i}", input_source="bench", content="lorem ipsum " * 200)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _fresh_db(tmpdir, "legacy.db", wal=False)
+        legacy_ops, legacy_errors = _run(_legacy_add, _legacy_get)
+
+        _fresh_db(tmpdir, "pooled.db", wal=True)
+        pooled_ops, pooled_errors = _run(_pooled_add, _pooled_get)
+        dbm.get_pool().close()
+
+    print(f"threads={THREADS} ops/thread={OPS_PER_THREAD} write_ratio={WRITE_RATIO}")
+    print(f"  connect-per-call : {legacy_ops:10.0f} ops/s  ({legacy_errors} lock errors)")
+    print(f"  pooled + WAL     : {pooled_ops:10.0f} ops/s  ({pooled_errors} lock errors)")
+    print(f"  speedup          : {pooled_ops / legacy_ops:.2f}x")
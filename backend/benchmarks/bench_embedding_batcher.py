@@ -0,0 +1,91 @@
+"""
+Query embedding throughput under concurrent load: each client thread embeds distinct
+queries back to back, once straight through the model and once through
+BatchingEmbeddings (db/embedding_batcher.py). Reports queries/sec, p50/p95 latency
+and the mean batch size the batcher formed.
+
+Uses the real embedding model (uncached) by default. --simulated replaces it with a
+stand-in whose forward pass holds a lock (CPU inference already uses every core) and
+costs a fixed overhead plus a per-row cost, which is enough to see the effect
+without torch. Run from ./backend:
+    python -m benchmarks.bench_embedding_batcher [--simulated] [--wait-ms 5] [--max-batch 32]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from db.embedding_batcher import BatchingEmbeddings
+
+CONCURRENCY = (1, 4, 16, 64)
+QUERIES_PER_CLIENT = 50
+
+
+class SimulatedModel:
+    """Forward pass = 8 ms fixed + 0.3 ms per row, one at a time."""
+
+    def __init__(self, fixed_ms: float = 8.0, per_row_ms: float = 0.3):
+        self.fixed, self.per_row = fixed_ms / 1000, per_row_ms / 1000
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            time.sleep(self.fixed + self.per_row * len(texts))
+        return [[float(len(t)), 0.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _load(embeddings, clients: int, queries_per_client: int, tag: str):
+    latencies, lock = [], threading.Lock()
+
+    def client(c):
+        mine = []
+        for i in range(queries_per_client):
+            start = time.perf_counter()
+            embeddings.embed_query(f"{tag} query {c}-{i} about retrieval and notes")
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--simulated", action="store_true", help="use a stand-in model instead of the real one")
+    parser.add_argument("--wait-ms", type=float, default=None)
+    parser.add_argument("--max-batch", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_CLIENT, help="queries per client")
+    args = parser.parse_args()
+
+    if args.simulated:
+        model = SimulatedModel()
+    else:
+        from db import model_registry
+        model = model_registry.get_model(model_registry.DEFAULT_EMBEDDING_MODEL)
+        model.embed_documents(["warm up"] * 8)
+
+    options = {}
+    if args.wait_ms is not None:
+        options["max_wait_ms"] = args.wait_ms
+    if args.max_batch is not None:
+        options["max_batch_size"] = args.max_batch
+
+    print(f"{'clients':>7} {'mode':8} {'q/sec':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch':>6}")
+    for clients in CONCURRENCY:
+        rate, p50, p95 = _load(model, clients, args.queries, f"direct{clients}")
+        print(f"{clients:>7} {'direct':8} {rate:>8.1f} {p50:>8.2f} {p95:>8.2f} {1:>6}")
+        batcher = BatchingEmbeddings(model, **options)
+        rate, p50, p95 = _load(batcher, clients, args.queries, f"batched{clients}")
+        mean_batch = batcher.queries / max(batcher.batches, 1)
+        print(f"{clients:>7} {'batched':8} {rate:>8.1f} {p50:>8.2f} {p95:>8.2f} {mean_batch:>6.1f}")
@@ -0,0 +1,121 @@
+"""
+/search retrieval quality and latency: vector-only (current path) vs hybrid BM25 + vector with RRF.
+
+Each synthetic note covers one topic and carries a unique identifier/acronym, like the
+"AUPR" in the sample note. Identifier queries have exactly one relevant note; topic
+queries (paraphrased, no shared identifier) are relevant to every note of that topic.
+Reports recall@k and p50/p95 latency per query type. Every query is timed cold: the
+in-process query-embedding and result caches are cleared before each one, and the
+on-disk embedding cache is off, so repeated topic queries measure real searches.
+
+Needs the embedding model. Run from ./backend:
+    python -m benchmarks.bench_hybrid_search
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import db.chroma_manager as cm
+import db.database_manager as dbm
+from db import model_registry, search_cache
+from db.migrations import run_migrations
+
+K = 5
+NOTES_PER_TOPIC = 40
+
+TOPICS = {
+    "evaluation": (
+        "Precision and recall trade off against each other; the {ident} metric summarises "
+        "the precision-recall curve for imbalanced classification problems.",
+        "how do I measure a classifier on a heavily imbalanced dataset",
+    ),
+    "attention": (
+        "Self-attention lets every token attend to every other token. The {ident} variant "
+        "reduces the quadratic cost of long sequences in transformer layers.",
+        "making transformers cheaper on very long inputs",
+    ),
+    "optimisation": (
+        "Gradient descent with momentum smooths noisy updates; {ident} adapts the learning "
+        "rate per parameter using running averages of squared gradients.",
+        "optimizers that tune the step size for each weight",
+    ),
+    "retrieval": (
+        "Dense retrieval embeds queries and passages in one space; {ident} combines it with "
+        "sparse lexical matching so rare terms are not lost.",
+        "mixing keyword search with embedding search",
+    ),
+}
+
+
+def _identifier(rnd: random.Random) -> str:
+    letters = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+    return "".join(rnd.choice(letters) for _ in range(4)) + str(rnd.randint(10, 99))
+
+
+def _vector_only(query: str, k: int):
+    seen = []
+    for doc, _ in cm.search_notes_with_scores(query, k=k):
+        if doc.metadata["note_id"] not in seen:
+            seen.append(doc.metadata["note_id"])
+    return seen
+
+
+def _hybrid(query: str, k: int):
+    return [hit["note_id"] for hit in cm.hybrid_search(query, k=k)]
+
+
+def _evaluate(search, queries):
+    recalls, latencies = [], []
+    for query, relevant in queries:
+        search_cache.query_embeddings.clear()
+        search_cache.search_results.clear()
+        start = time.perf_counter()
+        found = search(query, K)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found[:K]) & relevant) / min(len(relevant), K))
+    latencies.sort()
+    return (
+        statistics.mean(recalls),
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.95) - 1],
+    )
+
+
+if __name__ == "__main__":
+    rnd = random.Random(0)
+    model_registry.EMBEDDING_CACHE_ENABLED = False
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbm.DB_PATH = os.path.join(tmpdir, "bench.db")
+        cm.CHROMA_PATH = os.path.join(tmpdir, "chroma")
+        dbm.init_db()
+        run_migrations()
+
+        ident_queries, topic_ids = [], {topic: set() for topic in TOPICS}
+        notes = []
+        for topic, (template, _) in TOPICS.items():
+            for _ in range(NOTES_PER_TOPIC):
+                ident = _identifier(rnd)
+                content = template.format(ident=ident)
+                note_id = dbm.add_note(title=f"{topic} notes", input_source="bench", content=content)
+                notes.append({"id": note_id, "title": f"{topic} notes", "content": content})
+                ident_queries.append((ident, {note_id}))
+                topic_ids[topic].add(note_id)
+        cm.index_notes_in_chroma(notes)
+
+        topic_queries = [(query, topic_ids[topic]) for topic, (_, query) in TOPICS.items()] * 10
+        rnd.shuffle(ident_queries)
+        ident_queries = ident_queries[:80]
+
+        # warm up the model and both indexes
+        _hybrid("warm up", K)
+
+        print(f"notes={len(notes)} k={K}")
+        print(f"{'queries':12} {'mode':8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, queries in (("identifier", ident_queries), ("topic", topic_queries)):
+            for mode, search in (("vector", _vector_only), ("hybrid", _hybrid)):
+                recall, p50, p95 = _evaluate(search, queries)
+                print(f"{label:12} {mode:8} {recall:>9.2f} {p50:>8.2f} {p95:>8.2f}")
+
+        dbm.get_pool().close()
@@ -0,0 +1,83 @@
+"""
+/search hydration latency: one note lookup per hit (N+1) vs a single get_notes_by_ids().
+
+The N+1 baseline is measured twice: opening a new connection per lookup, as
+get_note_by_id() did before the connection pool, and through today's pooled
+get_note_by_id(). The speedup column is bulk vs the connect-per-call baseline.
+
+Run from ./backend:
+    python -m benchmarks.bench_note_hydration
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import db.database_manager as dbm
+
+NUM_NOTES = 2000
+REPEATS = 30
+
+
+def _connect_per_call_note(note_id):
+    """The pre-pool get_note_by_id(): a fresh connection per lookup."""
+    conn = sqlite3.connect(dbm.DB_PATH)
+    row = conn.execute("SELECT * FROM notes WHERE id=?", (note_id,)).fetchone()
+    conn.close()
+    return dbm._note_row_to_dict(row) if row else None
+
+
+def _n_plus_one(hits, get_note=dbm.get_note_by_id):
+    seen, notes = set(), []
+    for nid in hits:
+        if nid not in seen:
+            note = get_note(nid)
+            if note:
+                notes.append(note)
+            seen.add(nid)
+    return notes
+
+
+def _n_plus_one_unpooled(hits):
+    return _n_plus_one(hits, get_note=_connect_per_call_note)
+
+
+def _bulk(hits):
+    return dbm.get_notes_by_ids(hits)
+
+
+def _median_ms(fn, hits):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(hits)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbm.DB_PATH = os.path.join(tmpdir, "bench.db")
+        dbm.init_db()
+        for i in range(NUM_NOTES):
+            dbm.add_note(
+                title=f"note {i}",
+                input_source="bench",
+                content="lorem ipsum dolor sit amet " * 150,
+                tags=["bench", f"t{i % 20}"],
+            )
+
+        print(f"notes={NUM_NOTES} repeats={REPEATS} (median ms)")
+        print(f"{'k':>5} {'N+1':>10} {'N+1 pool':>10} {'bulk':>10} {'speedup':>8}")
+        for k in (5, 50, 200):
+            # chunk hits repeat note IDs, as Chroma results do
+            hits = [rnd.randint(1, NUM_NOTES) for _ in range(k)]
+            n1 = _median_ms(_n_plus_one_unpooled, hits)
+            n1_pooled = _median_ms(_n_plus_one, hits)
+            bulk = _median_ms(_bulk, hits)
+            print(f"{k:>5} {n1:>10.2f} {n1_pooled:>10.2f} {bulk:>10.2f} {n1 / bulk:>7.1f}x")
+
+        dbm.get_pool().close()
@@ -0,0 +1,92 @@
+"""
+ONNX Runtime embedding backends vs PyTorch (HuggingFaceEmbeddings) for all-MiniLM-L6-v2.
+
+Parity: cosine similarity between each text's PyTorch and ONNX vector, and the largest
+difference between the two pairwise-similarity matrices (what ranking actually uses).
+Exits with status 1 if a backend falls below its PARITY_MIN_COSINE.
+Throughput: chunk-sized documents/sec for batched indexing and p50 single-query latency.
+
+Needs torch, transformers and onnxruntime. Run from ./backend:
+    python -m benchmarks.bench_onnx_embeddings [--parity-only]
+"""
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from db import model_registry
+
+MODEL = model_registry.DEFAULT_EMBEDDING_MODEL
+BACKENDS = ("onnx", "onnx-int8")
+PARITY_MIN_COSINE = {"onnx": 0.9999, "onnx-int8": 0.98}
+NUM_DOCUMENTS = 512
+NUM_QUERIES = 100
+
+SENTENCES = [
+    "The AUPR metric summarises the precision-recall curve for imbalanced data.",
+    "Self-attention lets every token attend to every other token in the sequence.",
+    "Adam adapts the learning rate per parameter using running averages of gradients.",
+    "Dense retrieval embeds queries and passages into a shared vector space.",
+    "SQLite in WAL mode lets readers proceed while a single writer commits.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The French Revolution began in 1789 with the storming of the Bastille.",
+    "def fibonacci(n): return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)",
+    "Café, naïve, façade: accents should not break tokenisation.",
+    "",
+]
+
+
+def _documents(rnd, n):
+    words = " ".join(SENTENCES).split()
+    # ~500-character chunks, like chroma_manager's splitter produces
+    return [" ".join(rnd.choice(words) for _ in range(80))[:500] for _ in range(n)]
+
+
+def _parity(torch_model, model, texts):
+    a = np.asarray(torch_model.embed_documents(texts), dtype=np.float64)
+    b = np.asarray(model.embed_documents(texts), dtype=np.float64)
+    a /= np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b /= np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    per_text = (a * b).sum(axis=1)
+    matrix_diff = np.abs(a @ a.T - b @ b.T).max()
+    return per_text.min(), per_text.mean(), matrix_diff
+
+
+def _throughput(model, documents, queries):
+    model.embed_documents(documents[:32])  # warm up
+    start = time.perf_counter()
+    model.embed_documents(documents)
+    docs_per_sec = len(documents) / (time.perf_counter() - start)
+
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        model.embed_query(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return docs_per_sec, statistics.median(samples)
+
+
+if __name__ == "__main__":
+    rnd = random.Random(0)
+    torch_model = model_registry.get_model(MODEL, backend="torch")
+    texts = SENTENCES + _documents(rnd, 50) + [" ".join(SENTENCES) * 4]  # last one exceeds 256 tokens
+
+    failed = False
+    print(f"{'backend':10} {'min cos':>9} {'mean cos':>9} {'max |Δsim|':>11}")
+    for backend in BACKENDS:
+        low, mean, diff = _parity(torch_model, model_registry.get_model(MODEL, backend=backend), texts)
+        ok = low >= PARITY_MIN_COSINE[backend]
+        failed |= not ok
+        print(f"{backend:10} {low:>9.5f} {mean:>9.5f} {diff:>11.5f} {'ok' if ok else 'FAIL'}")
+
+    if "--parity-only" not in sys.argv:
+        documents = _documents(rnd, NUM_DOCUMENTS)
+        queries = [rnd.choice(SENTENCES[:-1]) + f" {i}" for i in range(NUM_QUERIES)]
+        print(f"\n{'backend':10} {'docs/sec':>9} {'query p50 ms':>13}")
+        for backend in ("torch",) + BACKENDS:
+            rate, p50 = _throughput(model_registry.get_model(MODEL, backend=backend), documents, queries)
+            print(f"{backend:10} {rate:>9.1f} {p50:>13.2f}")
+
+    sys.exit(1 if failed else 0)
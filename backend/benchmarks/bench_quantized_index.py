@@ -0,0 +1,70 @@
+"""
+Quantized vector storage: recall@k, resident index memory and query latency of
+int8 / float16 first-pass search (with and without float32 rescoring) against exact
+float32 brute force.
+
+Vectors are synthetic, unit-normalised and clustered like MiniLM chunk embeddings
+(384 dims), so the benchmark runs without the model. Run from ./backend:
+    python -m benchmarks.bench_quantized_index [num_vectors]
+"""
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from db.quantized_index import QuantizedIndex
+
+DIM = 384
+K = 10
+NUM_QUERIES = 200
+
+
+def _clustered(rng, n, centers):
+    labels = rng.integers(0, len(centers), size=n)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _exact(vectors, query, k):
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    return set(np.argpartition(distances, k)[:k].tolist())
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(64, DIM)).astype(np.float32)
+    vectors = _clustered(rng, n, centers).astype(np.float32)
+    queries = _clustered(rng, NUM_QUERIES, centers).astype(np.float32)
+    truth = [_exact(vectors, q, K) for q in queries]
+
+    print(f"vectors={n} dim={DIM} k={K} queries={NUM_QUERIES}")
+    print(f"{'mode':22} {'recall@k':>9} {'RAM MB':>8} {'p50 ms':>8}")
+
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        _exact(vectors, q, K)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{'float32 exact':22} {1.0:>9.3f} {vectors.nbytes / 2**20:>8.1f} {statistics.median(samples):>8.2f}")
+
+    ids = [str(i) for i in range(n)]
+    for dtype in ("float16", "int8"):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = QuantizedIndex(tmpdir, dtype)
+            index.add(ids, vectors, np.zeros(n, dtype=np.int64))
+            index.persist()
+            for rescore in (False, True):
+                recalls, samples = [], []
+                for q, relevant in zip(queries, truth):
+                    start = time.perf_counter()
+                    hits = index.search(q, k=K, rescore=rescore)
+                    samples.append((time.perf_counter() - start) * 1000)
+                    recalls.append(len({int(i) for i, _ in hits} & relevant) / K)
+                label = f"{dtype} {'+ rescore' if rescore else 'first pass'}"
+                print(
+                    f"{label:22} {statistics.mean(recalls):>9.3f} "
+                    f"{index.memory_bytes / 2**20:>8.1f} {statistics.median(samples):>8.2f}"
+                )
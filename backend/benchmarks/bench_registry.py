@@ -0,0 +1,99 @@
+"""
+Resident memory and p50 search latency: per-call Chroma clients + per-agent model copies
+(old behaviour) vs the shared model/store registry.
+
+Each mode runs in its own subprocess so RSS numbers don't bleed into each other.
+Run from ./backend:
+    python -m benchmarks.bench_registry
+"""
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+QUERIES = ["precision recall curve", "transformer attention", "gradient descent", "AUPR"] * 10
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def _seed(store):
+    store.add_texts(
+        texts=[f"note {i} about precision, recall, attention and optimisation" for i in range(200)],
+        metadatas=[{"note_id": i, "title": f"note {i}"} for i in range(200)],
+    )
+
+
+def _run_old(persist_dir):
+    from keybert import KeyBERT
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import Chroma
+
+    # chroma_manager, IngestionAgent(use_semantic=True) and ConceptExtractionAgent each loaded a copy
+    embeddings = HuggingFaceEmbeddings(model_name=MODEL)
+    HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    KeyBERT("all-MiniLM-L6-v2")
+
+    def get_store():
+        return Chroma(collection_name="notes", embedding_function=embeddings, persist_directory=persist_dir)
+
+    _seed(get_store())
+    samples = []
+    for q in QUERIES:
+        start = time.perf_counter()
+        get_store().similarity_search_with_score(q, k=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _run_new(persist_dir):
+    from db import model_registry
+
+    model_registry.get_embeddings(MODEL)
+    model_registry.get_embeddings("all-MiniLM-L6-v2")
+    model_registry.get_keybert("all-MiniLM-L6-v2")
+
+    def get_store():
+        return model_registry.get_vector_store("notes", persist_dir, MODEL)
+
+    _seed(get_store())
+    samples = []
+    for q in QUERIES:
+        start = time.perf_counter()
+        get_store().similarity_search_with_score(q, k=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        mode, persist_dir = sys.argv[1], sys.argv[2]
+        samples = (_run_old if mode == "old" else _run_new)(persist_dir)
+        print(json.dumps({
+            "rss_mb": _rss_mb(),
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "p50_ms": statistics.median(samples),
+        }))
+        sys.exit(0)
+
+    results = {}
+    for mode in ("old", "new"):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_registry", mode, tmpdir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{'':8} {'RSS MB':>8} {'peak MB':>8} {'p50 ms':>8}")
+    for mode, label in (("old", "before"), ("new", "after")):
+        r = results[mode]
+        print(f"{label:8} {r['rss_mb']:8.0f} {r['peak_rss_mb']:8.0f} {r['p50_ms']:8.2f}")
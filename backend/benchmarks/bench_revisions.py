@@ -0,0 +1,59 @@
+"""
+Revision history storage: delta + periodic snapshot table vs one full copy per revision.
+
+Run from ./backend:
+    python -m benchmarks.bench_revisions
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+
+import db.database_manager as dbm
+
+SECTIONS = 40
+REVISIONS = 100
+
+
+def _section(rnd, label):
+    words = " ".join(f"term{rnd.randint(0, 2000)}" for _ in range(120))
+    return f"## {label}\n\n{words}\n\n- point one\n- point two\n\n"
+
+
+if __name__ == "__main__":
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbm.DB_PATH = os.path.join(tmpdir, "bench.db")
+        dbm.init_db()
+
+        sections = [_section(rnd, f"Section {i}") for i in range(SECTIONS)]
+        note_id = dbm.add_note(title="bench", input_source="bench", content="".join(sections))
+        versions = ["".join(sections)]
+
+        # Each revision rewrites one or two sections, as a style re-run on part of a note would
+        for r in range(REVISIONS - 1):
+            for _ in range(rnd.randint(1, 2)):
+                sections[rnd.randrange(SECTIONS)] = _section(rnd, f"Edited {r}")
+            dbm.update_note(note_id, content="".join(sections))
+            versions.append("".join(sections))
+
+        raw_copies = sum(len(v.encode()) for v in versions)
+        zlib_copies = sum(len(zlib.compress(v.encode(), 9)) for v in versions)
+        stored = sum(r["stored_bytes"] for r in dbm.get_note_revisions(note_id))
+
+        samples = []
+        for rev in range(1, REVISIONS + 1):
+            start = time.perf_counter()
+            doc = dbm.get_note_revision(note_id, rev)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert doc["content"] == versions[rev - 1]
+
+        dbm.get_pool().close()
+
+    print(f"note ~{len(versions[-1]) // 1024} KiB, {REVISIONS} revisions, snapshot every {dbm.REVISION_SNAPSHOT_EVERY}")
+    print(f"  full copies (raw)  : {raw_copies / 1024:10.1f} KiB")
+    print(f"  full copies (zlib) : {zlib_copies / 1024:10.1f} KiB")
+    print(f"  delta revisions    : {stored / 1024:10.1f} KiB  ({raw_copies / stored:.1f}x smaller than raw)")
+    print(f"  reconstruct        : median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
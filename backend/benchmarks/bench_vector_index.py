@@ -0,0 +1,98 @@
+"""
+Vector index backends (db/vector_index.py): build time, p50 query latency and recall@k
+against exact float32 search.
+
+By default the corpus is our notes: every note in notes.db is split with the
+chroma_manager splitter and embedded (needs the embedding model). --synthetic N uses N
+clustered, unit-normalised 384-d vectors instead. Queries are held-out perturbations of
+stored vectors. Run from ./backend:
+    python -m benchmarks.bench_vector_index [--synthetic 50000] [--db db/notes.db]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from db.quantized_index import QuantizedIndex
+from db.vector_index import HnswVectorIndex
+
+K = 10
+NUM_QUERIES = 200
+
+
+def _notes_corpus(db_path):
+    import db.chroma_manager as cm
+    import db.database_manager as dbm
+
+    dbm.DB_PATH = db_path
+    ids, texts, note_ids = [], [], []
+    for note in dbm.iter_notes():
+        chunks = cm.splitter.split_text(note.get("content") or "")
+        ids.extend(cm.chunk_ids_for(note["id"], chunks))
+        texts.extend(chunks)
+        note_ids.extend([note["id"]] * len(chunks))
+    vectors = np.asarray(cm.get_embeddings().embed_documents(texts), dtype=np.float32)
+    return ids, vectors, note_ids
+
+
+def _synthetic_corpus(n, rng):
+    centers = rng.normal(size=(max(8, n // 500), 384)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size=n)] + 0.35 * rng.normal(size=(n, 384))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    return [f"{i // 4}:{i}" for i in range(n)], vectors, [i // 4 for i in range(n)]
+
+
+def _backends(tmpdir):
+    yield "numpy float32", QuantizedIndex(f"{tmpdir}/numpy-f32", "float32")
+    yield "numpy int8", QuantizedIndex(f"{tmpdir}/numpy-int8", "int8")
+    yield "numpy float16", QuantizedIndex(f"{tmpdir}/numpy-f16", "float16")
+    yield "hnsw", HnswVectorIndex(f"{tmpdir}/hnsw")
+    try:
+        import chromadb
+        from db.vector_index import ChromaVectorIndex
+
+        client = chromadb.PersistentClient(path=f"{tmpdir}/chroma")
+        yield "chroma", ChromaVectorIndex(client.get_or_create_collection("bench"))
+    except ImportError:
+        print("(chromadb not installed: skipping the chroma backend)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of notes.db")
+    parser.add_argument("--db", default="db/notes.db")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ids, vectors, note_ids = _synthetic_corpus(args.synthetic, rng) if args.synthetic else _notes_corpus(args.db)
+    picks = rng.choice(len(vectors), size=min(NUM_QUERIES, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(len(picks), vectors.shape[1])).astype(np.float32)
+    k = min(K, len(vectors))
+
+    truth = []
+    for q in queries:
+        distances = ((vectors - q) ** 2).sum(axis=1)
+        truth.append({ids[i] for i in np.argpartition(distances, k - 1)[:k]})
+
+    print(f"vectors={len(vectors)} dim={vectors.shape[1]} k={k} queries={len(queries)}")
+    print(f"{'backend':14} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, index in _backends(tmpdir):
+            start = time.perf_counter()
+            index.add(ids, vectors, note_ids)
+            index.persist()
+            build = time.perf_counter() - start
+
+            samples, recalls = [], []
+            for q, relevant in zip(queries, truth):
+                start = time.perf_counter()
+                hits = index.search(q, k=k)
+                samples.append((time.perf_counter() - start) * 1000)
+                recalls.append(len({chunk_id for chunk_id, _ in hits} & relevant) / k)
+            samples.sort()
+            print(
+                f"{name:14} {build:>8.2f} {statistics.median(samples):>8.3f} "
+                f"{samples[int(len(samples) * 0.95) - 1]:>8.3f} {statistics.mean(recalls):>9.3f}"
+            )
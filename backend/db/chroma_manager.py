@@ -1,61 +1,581 @@
+import base64
+import calendar
+import hashlib
+import json
 import os
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from db import model_registry, related_notes, search_cache
+from db.quantized_index import DTYPES
+from db.vector_index import VECTOR_INDEX_BACKENDS
+from db.database_manager import (
+    bump_index_generation,
+    delete_chunk_manifests,
+    delete_note_embeddings,
+    get_chunk_manifests,
+    get_existing_note_ids,
+    get_filtered_note_ids,
+    get_index_generation,
+    get_note_by_id,
+    get_note_contents,
+    get_note_embeddings,
+    save_chunk_manifests,
+    search_notes_fulltext,
+    source_type,
+)
 
 CHROMA_PATH = "db/chroma_store"
-
-# Initialize embedding model
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+COLLECTION_NAME = "notes"
+EMBEDDING_MODEL = model_registry.DEFAULT_EMBEDDING_MODEL
 
 # Initialize splitter
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+# Where chunk text lives. "text" stores a copy of every chunk as its Chroma document;
+# "offsets" stores only (note_id, start, end) in the chunk metadata and slices the text
+# out of notes.content when a search returns it, so SQLite stays the single copy.
+# Switching modes takes effect for newly indexed chunks; re-index to convert the rest.
+CHUNK_STORAGE = os.getenv("CHUNK_STORAGE", "text")
+CHUNK_STORAGE_MODES = ("text", "offsets")
+if CHUNK_STORAGE not in CHUNK_STORAGE_MODES:
+    raise ValueError(f"CHUNK_STORAGE must be one of {CHUNK_STORAGE_MODES}, got {CHUNK_STORAGE!r}")
+
+# Hybrid retrieval: reciprocal rank fusion constant and candidate depth per retriever
+RRF_K = 60
+HYBRID_FETCH_MULTIPLIER = 4
+
+# Grouped (note-level) search: initial chunk over-fetch per requested note, doubled
+# until enough distinct notes are found or the collection is exhausted
+GROUPED_OVERFETCH = 4
+GROUPED_SCORING = ("max", "sum")
+# "sum" scores add up similarities over this many top chunks, the same for every page,
+# so a note's score (and its page) doesn't depend on how deep the cursor is
+GROUPED_SUM_DEPTH = 400
+
+def _per_collection(setting: str) -> dict:
+    """"notes=hnsw,other=numpy" -> {"notes": "hnsw", "other": "numpy"}"""
+    return dict(item.strip().split("=", 1) for item in os.getenv(setting, "").split(",") if "=" in item)
+
+# Per-collection vector search engine: "chroma" (default), "numpy" or "hnsw" (see
+# db/vector_index.py), e.g. VECTOR_INDEX="notes=hnsw". VECTOR_QUANTIZATION="notes=int8"
+# (or float16) stores the numpy engine's vectors quantized and implies VECTOR_INDEX=numpy.
+VECTOR_INDEX = _per_collection("VECTOR_INDEX")
+VECTOR_QUANTIZATION = _per_collection("VECTOR_QUANTIZATION")
+
+# The vector lookup of a hybrid query runs here while its BM25 lookup runs on the
+# calling thread. Sized like FastAPI's request threadpool (40 threads), so concurrent
+# searches don't queue behind each other and their query embeddings can be batched
+# together (db/embedding_batcher.py).
+HYBRID_SEARCH_WORKERS = int(os.getenv("HYBRID_SEARCH_WORKERS", "40"))
+_search_executor = ThreadPoolExecutor(max_workers=HYBRID_SEARCH_WORKERS, thread_name_prefix="hybrid-search")
+
+# Held by every writer of the collection in this process, and by the orphan sweeper
+# (db/vector_sync.py) so it never sees chunks whose manifest isn't saved yet
+index_lock = threading.RLock()
+
+def get_embeddings():
+    """Shared embedding model (loaded once per process)"""
+    return model_registry.get_embeddings(EMBEDDING_MODEL)
 
 def get_vector_store():
-    """Load or create the persistent Chroma vector store"""
-    os.makedirs(CHROMA_PATH, exist_ok=True)
-    return Chroma(
-        collection_name="notes",
-        embedding_function=embeddings,
-        persist_directory=CHROMA_PATH,
-    )
+    """Shared persistent Chroma vector store (created once per process)"""
+    return model_registry.get_vector_store(COLLECTION_NAME, CHROMA_PATH, EMBEDDING_MODEL)
 
-def update_note_in_chroma(note_id: int, title: str, content: str):
-    """Split note and store embeddings"""
-    vector_store = get_vector_store()
+def _fill_side_index(index):
+    """Copy the vectors already stored in Chroma into a newly enabled side index."""
+    if len(index):
+        return
+    collection = get_vector_store()._collection
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "metadatas"], limit=1000, offset=offset)
+        if not page["ids"]:
+            break
+        index.add(page["ids"], page["embeddings"], [(m or {}).get("note_id", -1) for m in page["metadatas"]])
+        offset += len(page["ids"])
+    index.persist()
+
+def vector_index_settings():
+    """(backend, dtype) serving vector search for the collection"""
+    dtype = VECTOR_QUANTIZATION.get(COLLECTION_NAME, "none")
+    dtype = "float32" if dtype == "none" else dtype
+    backend = VECTOR_INDEX.get(COLLECTION_NAME, "numpy" if dtype != "float32" else "chroma")
+    if backend not in VECTOR_INDEX_BACKENDS or dtype not in DTYPES:
+        raise ValueError(f"Unsupported vector index {backend}/{dtype} for {COLLECTION_NAME}")
+    if dtype != "float32" and backend != "numpy":
+        raise ValueError("VECTOR_QUANTIZATION is only supported by the numpy vector index")
+    return backend, dtype
+
+def get_side_index():
+    """The numpy/hnsw index serving the collection's vector search, or None when Chroma does"""
+    backend, dtype = vector_index_settings()
+    if backend == "chroma":
+        return None
+    return model_registry.get_vector_index(COLLECTION_NAME, CHROMA_PATH, backend, dtype, build=_fill_side_index)
 
-    # Split text into chunks
+def reset_collection():
+    """Drop every vector (Chroma collection, side indexes, chunk manifests, note embeddings) for a rebuild."""
+    # Writers look the store up under the lock, so none writes to (or keeps) the dropped collection
+    with index_lock:
+        get_vector_store().delete_collection()
+        for suffix in DTYPES + ("hnsw",):
+            shutil.rmtree(os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}.{suffix}"), ignore_errors=True)
+        model_registry.forget_collection(COLLECTION_NAME, CHROMA_PATH)
+        delete_chunk_manifests()
+        delete_note_embeddings()
+        bump_index_generation(COLLECTION_NAME)
+
+def chunk_ids_for(note_id: int, chunks: list) -> list:
+    """
+    Content-derived chunk IDs: "<note_id>:<sha1 of text>", with a ":<n>" suffix for
+    repeated chunks. Unchanged text keeps its ID, so its vector can be reused.
+    """
+    ids, seen = [], {}
+    for chunk in chunks:
+        digest = hashlib.sha1(chunk.encode()).hexdigest()[:20]
+        n = seen.get(digest, 0)
+        seen[digest] = n + 1
+        ids.append(f"{note_id}:{digest}" + (f":{n}" if n else ""))
+    return ids
+
+def _epoch(timestamp):
+    """
+    '2026-01-01 12:00:00' (as SQLite stores created_at) -> seconds, for numeric range
+    filters. None for strings that aren't ISO dates (imports keep created_at as given).
+    """
+    try:
+        return calendar.timegm(datetime.fromisoformat(str(timestamp)).utctimetuple())
+    except ValueError:
+        return None
+
+def note_metadata(note: dict) -> dict:
+    """
+    Metadata every chunk of a note carries, so searches can filter in Chroma's `where`:
+    note_id, title, source (url/pdf/text), created_ts (epoch seconds) and a
+    "tag:<tag>" / "concept:<concept>" flag per term (Chroma metadata has no lists).
+    """
+    metadata = {"note_id": note["id"], "title": note.get("title"), "source": source_type(note.get("input_source"))}
+    created_ts = _epoch(note["created_at"]) if note.get("created_at") else None
+    if created_ts is not None:
+        metadata["created_ts"] = created_ts
+    for field, prefix in (("tags", "tag"), ("concepts", "concept")):
+        for term in note.get(field) or []:
+            if isinstance(term, str) and term.strip():
+                metadata[f"{prefix}:{term.strip().lower()}"] = True
+    return metadata
+
+def chroma_where(filters: dict):
+    """Search filters (see database_manager.parse_search_query) -> Chroma `where` clause, or None."""
+    filters = filters or {}
+    clauses = []
+    for field, prefix in (("tags", "tag"), ("concepts", "concept")):
+        for term in dict.fromkeys(t.strip().lower() for t in filters.get(field) or []):
+            clauses.append({f"{prefix}:{term}": True})
+    if filters.get("sources"):
+        clauses.append({"source": {"$in": list(dict.fromkeys(filters["sources"]))}})
+    if filters.get("after"):
+        clauses.append({"created_ts": {"$gte": _epoch(filters["after"])}})
+    if filters.get("before"):
+        clauses.append({"created_ts": {"$lt": _epoch(filters["before"])}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def split_note(note: dict):
+    """
+    Chunk a note: (chunk IDs, chunk texts, metadatas). Each metadata is note_metadata();
+    in offsets mode it also holds the chunk's [start, end) character span in the content.
+    """
+    content = note.get("content") or ""
     chunks = splitter.split_text(content)
+    shared = note_metadata(note)
+    metadatas, start, previous = [], 0, 0
+    for chunk in chunks:
+        metadata = dict(shared)
+        if CHUNK_STORAGE == "offsets":
+            # consecutive chunks overlap by at most CHUNK_OVERLAP characters
+            found = content.find(chunk, max(0, start + previous - CHUNK_OVERLAP))
+            start, previous = (found if found >= 0 else content.find(chunk)), len(chunk)
+            metadata.update(start=start, end=start + len(chunk))
+        metadatas.append(metadata)
+    return chunk_ids_for(note["id"], chunks), chunks, metadatas
+
+def chunk_documents(texts: list):
+    """What to store as the Chroma documents of these chunks (nothing in offsets mode)"""
+    return texts if CHUNK_STORAGE == "text" else None
+
+def update_note_in_chroma(note_id: int, title: str, content: str):
+    """Split note and store embeddings (only new/changed chunks are embedded)"""
+    # tags, source and created_at for the chunk metadata come from the stored note
+    note = get_note_by_id(note_id) or {"id": note_id}
+    index_notes_in_chroma([{**note, "title": title, "content": content}])
+
+def index_notes_in_chroma(notes: list):
+    """
+    Incrementally (re)index notes. Each chunk's ID is derived from its content hash
+    and compared with the note's manifest: only chunks that are new are embedded,
+    and only chunks that vanished are deleted (kept chunks get their metadata
+    refreshed when the note's metadata or, in offsets mode, their position may have
+    changed). All notes share one delete, one add and one persist call. The notes'
+    pooled embeddings and related-notes lists are updated afterwards. `notes` are
+    dicts with at least id, title and content (plus the note_metadata() fields).
+    """
+    if not notes:
+        return
+
+    with index_lock:
+        vector_store = get_vector_store()
+        side_index = get_side_index()
+        manifests = get_chunk_manifests([note["id"] for note in notes])
+
+        texts, metadatas, add_ids = [], [], []
+        stale_ids, unmanaged_notes = [], []
+        retitled_ids, retitled_metadatas = [], []
+        new_manifests = {}
+
+        for note in notes:
+            note_id, title = note["id"], note.get("title")
+            ids, chunks, chunk_metadatas = split_note(note)
+            shared = note_metadata(note)
+
+            manifest = manifests.get(note_id)
+            if manifest is None:
+                # Indexed before manifests existed (random IDs): replace everything once
+                unmanaged_notes.append(note_id)
+                existing = set()
+            else:
+                existing = set(manifest["chunk_ids"])
+                stale_ids.extend(existing - set(ids))
+                previous = manifest.get("metadata")
+                if previous != shared or CHUNK_STORAGE == "offsets":
+                    # Chroma merges metadata on update: switch off tags/concepts that were removed
+                    dropped = {key: False for key in previous or {} if ":" in key and key not in shared}
+                    for chunk_id, metadata in zip(ids, chunk_metadatas):
+                        if chunk_id in existing:
+                            retitled_ids.append(chunk_id)
+                            retitled_metadatas.append({**dropped, **metadata})
+
+            for chunk_id, chunk, metadata in zip(ids, chunks, chunk_metadatas):
+                if chunk_id not in existing:
+                    add_ids.append(chunk_id)
+                    texts.append(chunk)
+                    metadatas.append(metadata)
+            new_manifests[note_id] = {"title": title, "chunk_ids": ids, "metadata": shared}
 
-    # Delete previous entries for same note (if any)
-    vector_store.delete(where={"note_id": note_id})
+        if unmanaged_notes:
+            vector_store.delete(where={"note_id": {"$in": unmanaged_notes}})
+            if side_index is not None:
+                side_index.delete_notes(unmanaged_notes)
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+            if side_index is not None:
+                side_index.delete(stale_ids)
+        if retitled_ids:
+            vector_store._collection.update(ids=retitled_ids, metadatas=retitled_metadatas)
+        known = {}
+        if texts and side_index is None and CHUNK_STORAGE == "text":
+            vector_store.add_texts(texts=texts, metadatas=metadatas, ids=add_ids)
+        elif texts:
+            # embed once: the same vectors go to Chroma and to the side index
+            vectors = get_embeddings().embed_documents(texts)
+            known = dict(zip(add_ids, vectors))
+            vector_store._collection.upsert(
+                ids=add_ids, embeddings=vectors, metadatas=metadatas, documents=chunk_documents(texts)
+            )
+            if side_index is not None:
+                side_index.add(add_ids, vectors, [m["note_id"] for m in metadatas])
 
-    # Add new embeddings
-    vector_store.add_texts(
-        texts=chunks,
-        metadatas=[{"note_id": note_id, "title": title}] * len(chunks)
+        vector_store.persist()
+        if side_index is not None:
+            side_index.persist()
+        save_chunk_manifests(new_manifests)
+        bump_index_generation(COLLECTION_NAME)
+        # re-pool notes whose chunks changed (or that have no pooled vector yet)
+        pooled = get_note_embeddings(EMBEDDING_MODEL, list(new_manifests))
+        repool = {
+            note_id: m for note_id, m in new_manifests.items()
+            if note_id not in pooled or manifests.get(note_id, {}).get("chunk_ids") != m["chunk_ids"]
+        }
+        if repool:
+            related_notes.update_notes(EMBEDDING_MODEL, _note_chunk_vectors(repool, known))
+
+    total = sum(len(m["chunk_ids"]) for m in new_manifests.values())
+    print(
+        f"✅ Indexed {len(notes)} note(s) in Chroma: {total} chunks, "
+        f"{len(texts)} embedded, {len(stale_ids)} removed."
     )
 
-    vector_store.persist()
-    print(f"✅ Indexed note {note_id} ({len(chunks)} chunks) in Chroma.")
+def _note_chunk_vectors(manifests: dict, known: dict) -> dict:
+    """{note_id: [chunk vectors]} for indexed notes: from `known` ({chunk_id: vector}), else read back from Chroma."""
+    vectors = dict(known)
+    missing = [i for m in manifests.values() for i in m["chunk_ids"] if i not in vectors]
+    collection = get_vector_store()._collection
+    for start in range(0, len(missing), 1000):
+        page = collection.get(ids=missing[start:start + 1000], include=["embeddings"])
+        vectors.update(zip(page["ids"], page["embeddings"]))
+    return {
+        note_id: [vectors[i] for i in m["chunk_ids"] if i in vectors] for note_id, m in manifests.items()
+    }
+
+def rebuild_related_notes() -> int:
+    """
+    Recompute every note's pooled embedding from the chunk vectors stored in Chroma,
+    then the whole related-notes graph (for indexes built before it existed).
+    Returns the number of notes in the graph.
+    """
+    sums, counts = {}, {}
+    collection = get_vector_store()._collection
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "metadatas"], limit=1000, offset=offset)
+        if not page["ids"]:
+            break
+        for vector, metadata in zip(page["embeddings"], page["metadatas"]):
+            note_id = (metadata or {}).get("note_id")
+            if isinstance(note_id, int):
+                sums[note_id] = sums.get(note_id, 0) + related_notes.pool([vector])
+                counts[note_id] = counts.get(note_id, 0) + 1
+        offset += len(page["ids"])
+
+    with index_lock:
+        existing = get_existing_note_ids(list(sums))
+        delete_note_embeddings()
+        related_notes.save_pooled(EMBEDDING_MODEL, {n: (sums[n], counts[n]) for n in existing})
+        return related_notes.rebuild_graph(EMBEDDING_MODEL)
+
+def delete_notes_from_chroma(note_ids: list) -> int:
+    """Remove every chunk of the given notes (and their manifests); returns how many chunks were indexed."""
+    if not note_ids:
+        return 0
+    with index_lock:
+        vector_store = get_vector_store()
+        side_index = get_side_index()
+        manifests = get_chunk_manifests(note_ids)
+        vector_store.delete(where={"note_id": {"$in": list(note_ids)}})
+        vector_store.persist()
+        if side_index is not None:
+            side_index.delete_notes(note_ids)
+            side_index.persist()
+        delete_chunk_manifests(list(note_ids))
+        bump_index_generation(COLLECTION_NAME)
+        related_notes.remove_notes(EMBEDDING_MODEL, list(note_ids))
+    return sum(len(m["chunk_ids"]) for m in manifests.values())
 
-def search_notes(query: str, k: int = 5):
+def embed_query(query: str) -> list:
+    """Query embedding, memoised in an in-process LRU cache"""
+    return search_cache.query_embeddings.get_or_compute(
+        (EMBEDDING_MODEL, query), lambda: get_embeddings().embed_query(query)
+    )
+
+def search_notes(query: str, k: int = 5, filters: dict = None):
     """Semantic search across all notes"""
-    vector_store = get_vector_store()
-    results = vector_store.similarity_search(query, k=k)
-    return results
+    return [doc for doc, _ in search_notes_with_scores(query, k=k, filters=filters)]
 
-def search_notes_with_scores(query: str, k: int = 3):
-    vector_store = get_vector_store()
-    results = vector_store.similarity_search_with_score(query, k=k)
+def search_notes_with_scores(query: str, k: int = 3, filters: dict = None):
+    """
+    (document, distance) pairs for the k nearest chunks, optionally restricted by
+    search filters (see database_manager.parse_search_query). Filters are applied
+    inside the search: as a Chroma `where` clause, or, for a side index, as the set
+    of matching note IDs resolved in SQL. Results are cached per collection
+    generation, which index writes and note deletes bump, so a cached result is
+    only served while the collection is unchanged.
+    """
+    generation = get_index_generation(COLLECTION_NAME)
+    filter_key = json.dumps(filters, sort_keys=True) if filters else None
+    key = (CHROMA_PATH, COLLECTION_NAME, EMBEDDING_MODEL, generation, query, k, filter_key)
+    results = search_cache.search_results.get(key)
+    if results is None:
+        side_index = get_side_index()
+        if side_index is not None:
+            note_ids = get_filtered_note_ids(filters) if filters else None
+            results = _load_chunks(side_index.search(embed_query(query), k=k, note_ids=note_ids))
+        elif CHUNK_STORAGE == "text":
+            vector_store = get_vector_store()
+            results = vector_store.similarity_search_by_vector_with_relevance_scores(
+                embed_query(query), k=k, filter=chroma_where(filters)
+            )
+        else:
+            results = _load_chunks(_query_collection(embed_query(query), k, chroma_where(filters)))
+        search_cache.search_results.set(key, results)
+    return list(results)
+
+def _query_collection(embedding, k: int, where: dict = None):
+    """(chunk_id, distance) of the k nearest chunks in Chroma matching `where`"""
+    if k <= 0:
+        return []
+    found = get_vector_store()._collection.query(
+        query_embeddings=[embedding], n_results=k, where=where, include=["distances"]
+    )
+    return list(zip(found["ids"][0], found["distances"][0]))
+
+def _load_chunks(hits):
+    """
+    (chunk_id, distance) hits -> (Document, distance), fetching metadata (and stored
+    text) from Chroma by ID. Chunks stored as offsets are sliced out of their note's
+    content, read once per note; hits whose note no longer exists are dropped.
+    """
+    if not hits:
+        return []
+    page = get_vector_store()._collection.get(ids=[chunk_id for chunk_id, _ in hits], include=["documents", "metadatas"])
+    stored = {i: (doc, meta or {}) for i, doc, meta in zip(page["ids"], page["documents"], page["metadatas"])}
+    contents = get_note_contents([meta.get("note_id") for doc, meta in stored.values() if doc is None])
+
+    results = []
+    for chunk_id, distance in hits:
+        if chunk_id not in stored:
+            continue
+        text, metadata = stored[chunk_id]
+        if text is None:
+            content = contents.get(metadata.get("note_id"))
+            if content is None or "start" not in metadata:
+                continue
+            text = content[metadata["start"]:metadata["end"]]
+        results.append((Document(page_content=text, metadata=metadata), distance))
     return results
 
 def search_within_note(note_id: int, query: str, k: int = 3):
     """Search only within a single note"""
     vector_store = get_vector_store()
-    results = vector_store.similarity_search(
-        query,
+    if CHUNK_STORAGE == "offsets":
+        return [doc for doc, _ in _load_chunks(_query_collection(embed_query(query), k, {"note_id": note_id}))]
+    results = vector_store.similarity_search_by_vector(
+        embed_query(query),
         k=k,
         filter={"note_id": note_id}
     )
     return results
+
+def _rank_notes(chunk_results):
+    """Chunk hits (best first) -> [(note_id, best distance, [documents])] in order of each note's best chunk."""
+    notes = {}
+    for doc, distance in chunk_results:
+        note_id = doc.metadata.get("note_id")
+        if note_id not in notes:
+            notes[note_id] = (note_id, distance, [])
+        notes[note_id][2].append(doc)
+    return list(notes.values())
+
+def hybrid_search(query: str, k: int = 5, fetch_k: int = None, filters: dict = None):
+    """
+    Note-level hybrid search. BM25 over the notes_fts index and vector search over
+    chunks run concurrently; their note rankings are fused with reciprocal rank fusion
+    (score = sum of 1 / (RRF_K + rank)), so exact identifiers and acronyms that the
+    embedding model blurs still surface. Returns up to k dicts, best first, with
+    note_id, title, score, vector_rank, lexical_rank, distance and documents (the
+    matching chunks, or the BM25 snippet for notes only the lexical side found).
+    `filters` restrict both retrievers (see database_manager.parse_search_query).
+    """
+    fetch_k = fetch_k or max(k * HYBRID_FETCH_MULTIPLIER, 20)
+    vector_future = _search_executor.submit(search_notes_with_scores, query, fetch_k, filters)
+    lexical_hits = search_notes_fulltext(query, fetch_k, False, 64, filters)
+
+    fused = {}
+
+    def entry(note_id, title):
+        return fused.setdefault(note_id, {
+            "note_id": note_id,
+            "title": title,
+            "score": 0.0,
+            "vector_rank": None,
+            "lexical_rank": None,
+            "distance": None,
+            "documents": [],
+        })
+
+    for rank, (note_id, distance, docs) in enumerate(_rank_notes(vector_future.result()), start=1):
+        hit = entry(note_id, docs[0].metadata.get("title"))
+        hit["score"] += 1.0 / (RRF_K + rank)
+        hit["vector_rank"], hit["distance"], hit["documents"] = rank, distance, docs
+
+    for rank, row in enumerate(lexical_hits, start=1):
+        hit = entry(row["id"], row["title"])
+        hit["score"] += 1.0 / (RRF_K + rank)
+        hit["lexical_rank"] = rank
+        if not hit["documents"]:
+            snippet = re.sub(r"</?mark>", "", row["snippet"] or "")
+            hit["documents"] = [Document(page_content=snippet, metadata={"note_id": row["id"], "title": row["title"]})]
+
+    return sorted(fused.values(), key=lambda h: -h["score"])[:k]
+
+def encode_search_cursor(score: float, note_id: int) -> str:
+    """Encode the (score, note_id) position of the last note of a grouped-search page."""
+    raw = json.dumps([score, note_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_search_cursor(cursor: str):
+    """Inverse of encode_search_cursor(); raises ValueError on malformed input."""
+    try:
+        score, note_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(note_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def _collection_size() -> int:
+    side_index = get_side_index()
+    return len(side_index) if side_index is not None else get_vector_store()._collection.count()
+
+def _group_by_note(chunk_results, scoring: str):
+    """
+    Chunk hits -> notes ranked by the max (or sum) of their chunks' similarities.
+    Distances are squared L2 between unit vectors, so similarity = 1 - distance / 2.
+    """
+    groups = {}
+    for doc, distance in chunk_results:
+        note_id = doc.metadata.get("note_id")
+        similarity = 1.0 - distance / 2.0
+        group = groups.get(note_id)
+        if group is None:
+            # results are sorted, so a note's first chunk is its best one
+            groups[note_id] = {
+                "note_id": note_id,
+                "title": doc.metadata.get("title"),
+                "score": similarity,
+                "distance": distance,
+                "chunks": 1,
+                "best_chunk": doc.page_content,
+            }
+            continue
+        group["chunks"] += 1
+        if scoring == "sum":
+            group["score"] += max(similarity, 0.0)
+    return sorted(groups.values(), key=lambda g: (-g["score"], g["note_id"]))
+
+def search_notes_grouped(query: str, k: int = 5, scoring: str = "max", cursor: str = None, filters: dict = None):
+    """
+    Note-level vector search returning k distinct notes (fewer only when the collection,
+    or the part of it matching `filters`, has no more) and a cursor for the next page
+    (None on the last page).
+    With "max" scoring chunks are over-fetched, starting at GROUPED_OVERFETCH per wanted
+    note and doubling until the page is full, so one long note can't crowd out the
+    others; the ranking is exact. With "sum" every page is cut from the notes of the top
+    GROUPED_SUM_DEPTH chunks, so pages end once those notes run out.
+    """
+    if scoring not in GROUPED_SCORING:
+        raise ValueError(f"scoring must be one of {GROUPED_SCORING}")
+    after = decode_search_cursor(cursor) if cursor else None
+
+    total = _collection_size()
+    if scoring == "sum":
+        fetch = min(GROUPED_SUM_DEPTH, total)
+    else:
+        fetch = min(max(k * GROUPED_OVERFETCH, 20), total)
+    while True:
+        results = search_notes_with_scores(query, k=fetch, filters=filters) if fetch else []
+        groups = _group_by_note(results, scoring)
+        if after is not None:
+            groups = [g for g in groups if (-g["score"], g["note_id"]) > (-after[0], after[1])]
+        # one extra note tells us whether another page exists; fewer chunks than asked = no more match
+        if len(groups) > k or fetch >= total or len(results) < fetch or scoring == "sum":
+            break
+        fetch = min(fetch * 2, total)
+
+    page = groups[:k]
+    next_cursor = encode_search_cursor(page[-1]["score"], page[-1]["note_id"]) if len(groups) > k else None
+    return page, next_cursor
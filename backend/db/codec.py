@@ -0,0 +1,143 @@
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+
+# Opt-in transparent compression for the large note columns.
+# Compressed values are stored as BLOBs: b"Z" + dictionary id (1 byte) + zlib stream.
+# Plain TEXT values are left untouched, so compressed and uncompressed rows can coexist
+# while an online migration is running (and after compression is switched off again).
+COMPRESSED_COLUMNS = ("content", "rewritten_notes", "resources", "evaluation")
+
+MAGIC = b"Z"
+NO_DICTIONARY = 0
+DICTIONARY_SIZE = 32 * 1024   # zlib uses at most the last 32 KiB of a preset dictionary
+MIN_COMPRESS_BYTES = 256      # smaller values aren't worth a BLOB header + zlib stream
+
+
+class ColumnCodec:
+    """Encodes/decodes compressed column values, optionally with a shared zlib dictionary."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        level: int = 6,
+        loader: Optional[Callable[[int], Optional[bytes]]] = None,
+    ):
+        self.enabled = enabled
+        self.level = level
+        self.loader = loader            # fetches a dictionary by id when it isn't cached
+        self.dictionaries: Dict[int, bytes] = {}
+        self.active_dictionary = NO_DICTIONARY
+        self._lock = threading.Lock()
+
+    # --- dictionaries ---
+
+    def add_dictionary(self, dict_id: int, data: bytes, activate: bool = True):
+        with self._lock:
+            self.dictionaries[dict_id] = data
+            if activate and dict_id > self.active_dictionary:
+                self.active_dictionary = dict_id
+
+    def _dictionary(self, dict_id: int) -> bytes:
+        if dict_id == NO_DICTIONARY:
+            return b""
+        data = self.dictionaries.get(dict_id)
+        if data is None and self.loader is not None:
+            data = self.loader(dict_id)
+            if data is not None:
+                self.add_dictionary(dict_id, data, activate=False)
+        if data is None:
+            raise ValueError(f"Unknown compression dictionary {dict_id}")
+        return data
+
+    # --- values ---
+
+    def encode(self, value, force: bool = False):
+        """Compress a TEXT value when enabled (or forced) and large enough; otherwise return it unchanged."""
+        if not (self.enabled or force) or not isinstance(value, str):
+            return value
+        raw = value.encode()
+        if len(raw) < MIN_COMPRESS_BYTES:
+            return value
+
+        dict_id = self.active_dictionary
+        zdict = self._dictionary(dict_id)
+        compressor = zlib.compressobj(self.level, zdict=zdict) if zdict else zlib.compressobj(self.level)
+        packed = MAGIC + bytes([dict_id]) + compressor.compress(raw) + compressor.flush()
+        return packed if len(packed) < len(raw) else value
+
+    def _decompressor(self, value: bytes):
+        zdict = self._dictionary(value[1])
+        return zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+
+    def decode(self, value):
+        """Inverse of encode(); non-BLOB values pass through unchanged."""
+        if not isinstance(value, bytes) or value[:1] != MAGIC:
+            return value
+        decompressor = self._decompressor(value)
+        return (decompressor.decompress(value[2:]) + decompressor.flush()).decode()
+
+    def decode_prefix(self, value, chars: int):
+        """First `chars` characters of a value, decompressing only as much as needed."""
+        if not isinstance(value, bytes) or value[:1] != MAGIC:
+            return value[:chars] if isinstance(value, str) else value
+        decompressor = self._decompressor(value)
+        # UTF-8 is at most 4 bytes per character
+        raw = decompressor.decompress(value[2:], chars * 4)
+        return raw.decode(errors="ignore")[:chars]
+
+    def register(self, conn):
+        """Expose note_text()/note_excerpt() to SQL (used by FTS triggers and list projections)."""
+        conn.create_function("note_text", 1, self.decode, deterministic=True)
+        conn.create_function("note_excerpt", 2, self.decode_prefix, deterministic=True)
+
+
+def train_dictionary(samples: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Build a zlib preset dictionary from sample values: lines and word trigrams that
+    recur across samples, weighted by how many bytes they would save. The most
+    valuable strings go last, where zlib can reach them with the shortest distances.
+    """
+    counts = Counter()
+    for sample in samples:
+        seen = set()
+        for line in sample.splitlines():
+            line = line.strip()
+            if 8 <= len(line) <= 200:
+                seen.add(line)
+        words = re.findall(r"\S+\s*", sample)
+        for i in range(len(words) - 2):
+            seen.add("".join(words[i:i + 3]))
+        counts.update(seen)   # document frequency, not raw frequency
+
+    ranked = sorted(
+        ((n * len(s.encode()), s) for s, n in counts.items() if n > 1),
+        reverse=True,
+    )
+    chosen, used = [], 0
+    for _, s in ranked:
+        b = s.encode()
+        if used + len(b) > size:
+            continue
+        chosen.append(b)
+        used += len(b)
+    return b"".join(reversed(chosen))
+
+
+def compression_enabled_from_env() -> bool:
+    return os.getenv("NOTES_COMPRESSION", "0").lower() in ("1", "true", "zlib")
+
+
+# Run from ./backend:  python -m db.codec
+# Trains a dictionary and compresses existing notes online (in small batches).
+if __name__ == "__main__":
+    from db.database_manager import init_db, compress_existing_notes
+    from db.migrations import run_migrations
+
+    init_db()
+    run_migrations()
+    count = compress_existing_notes()
+    print(f"✅ Compressed {count} notes. Set NOTES_COMPRESSION=1 so new writes are compressed too.")
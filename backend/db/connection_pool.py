@@ -0,0 +1,107 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Pragmas applied to every pooled connection.
+#   journal_mode=WAL     readers never block the writer (and vice versa)
+#   synchronous=NORMAL   safe with WAL, avoids an fsync per commit
+#   cache_size=-16000    ~16 MB page cache per connection (negative = KiB)
+#   mmap_size            memory-map up to 256 MB of the DB file for reads
+#   busy_timeout         wait for a competing writer instead of failing with "database is locked"
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+
+class SQLitePool:
+    """Small thread-safe pool of SQLite connections for a single database file."""
+
+    def __init__(self, db_path: str, max_size: int = 8, pragmas: dict = None, on_connect=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self.on_connect = on_connect   # called with each new connection (e.g. to register SQL functions)
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas.get("busy_timeout", 5000) / 1000,
+            check_same_thread=False,
+        )
+        for key, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {key}={value}")
+        if self.on_connect is not None:
+            self.on_connect(conn)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while under max_size."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool exhausted: block until another thread releases a connection
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool (or close it if the pool is closed)."""
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a `with` block.
+        Commits on success, rolls back on error, then hands the connection back.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections; connections still in use close on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
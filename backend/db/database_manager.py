@@ -1,111 +1,554 @@
 import sqlite3
 import json
+import base64
+import re
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+from db.connection_pool import SQLitePool
+from db.codec import (
+    ColumnCodec,
+    COMPRESSED_COLUMNS,
+    MAGIC,
+    compression_enabled_from_env,
+    train_dictionary,
+)
+from db.revision_delta import (
+    REVISION_FIELDS,
+    encode_snapshot,
+    encode_delta,
+    decode_snapshot,
+    apply_delta,
+)
+
 DB_PATH = "db/notes.db"
 
+#  COLUMN COMPRESSION           
+
+def _load_codec_dictionary(dict_id: int) -> Optional[bytes]:
+    """Fetch a compression dictionary on a private connection (never blocks on the pool)."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute("SELECT data FROM codec_dictionaries WHERE id = ?", (dict_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # table not created yet
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+# Compression of COMPRESSED_COLUMNS is opt-in (NOTES_COMPRESSION=1); reads always decode
+codec = ColumnCodec(enabled=compression_enabled_from_env(), loader=_load_codec_dictionary)
+
+
+def _on_connect(conn):
+    """Register note_text()/note_excerpt() and pick up the newest trained dictionary."""
+    codec.register(conn)
+    try:
+        row = conn.execute("SELECT id, data FROM codec_dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row:
+        codec.add_dictionary(row[0], row[1])
+
+#  CONNECTION POOL              
+
+_pool: Optional[SQLitePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SQLitePool:
+    """Return the process-wide pool for DB_PATH, (re)creating it if DB_PATH changed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = SQLitePool(DB_PATH, on_connect=_on_connect)
+        return _pool
+
+
+def get_connection():
+    """Context manager yielding a pooled connection; commits on exit, rolls back on error."""
+    return get_pool().connection()
+
+
 #  DATABASE INITIALIZATION      
 
 def init_db():
     """Initialize the SQLite database with notes and style_profiles tables."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # --- NOTES TABLE ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            input_source TEXT,
+            content TEXT,
+            concepts TEXT,
+            tags TEXT,
+            resources TEXT,
+            rewritten_notes TEXT,
+            evaluation TEXT,
+            total_score REAL,
+            indexing_status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+        # --- STYLE PROFILES TABLE ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS style_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_json TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+        # --- STYLE PROFILE ITEMS (one row per profile) ---
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS style_profile_items (
+            profile_id TEXT PRIMARY KEY,
+            data_json TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            position INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        _migrate_style_profile_blob(conn)
+
+        _init_fts(cursor)
+        _init_note_terms(cursor)
+
+        # --- NOTE REVISIONS (compressed snapshots + deltas) ---
+        cursor.executescript("""
+        CREATE TABLE IF NOT EXISTS note_revisions (
+            note_id INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('full', 'delta')),
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (note_id, revision)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS notes_revisions_ad AFTER DELETE ON notes BEGIN
+            DELETE FROM note_revisions WHERE note_id = old.id;
+        END;
+        """)
+
+
+def _migrate_style_profile_blob(conn):
+    """
+    Split the legacy single-blob style_profiles row into style_profile_items,
+    once, when the new table is still empty.
+    """
+    if conn.execute("SELECT 1 FROM style_profile_items LIMIT 1").fetchone():
+        return
+    row = conn.execute(
+        "SELECT data_json FROM style_profiles ORDER BY created_at DESC LIMIT 1"
+    ).fetchone()
+    if row and row[0]:
+        _upsert_style_profiles(conn, json.loads(row[0]))
+    # The blob now lives in style_profile_items; don't resurrect it on the next startup
+    conn.execute("DELETE FROM style_profiles")
+
+
+# These triggers (and notes_fts_source) call note_text(), which exists only on
+# connections that registered the codec functions: every pooled connection does
+# (_on_connect). Any other connection that writes to notes, e.g. a script using
+# sqlite3.connect(), must call codec.register(conn) first, or the write fails with
+# "no such function: note_text" / "SQL logic error".
+FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, title, content, concepts, tags)
+        VALUES (new.id, new.title, note_text(new.content), new.concepts, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content, concepts, tags)
+        VALUES ('delete', old.id, old.title, note_text(old.content), old.concepts, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content, concepts, tags ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content, concepts, tags)
+        VALUES ('delete', old.id, old.title, note_text(old.content), old.concepts, old.tags);
+        INSERT INTO notes_fts(rowid, title, content, concepts, tags)
+        VALUES (new.id, new.title, note_text(new.content), new.concepts, new.tags);
+    END
+    """,
+)
+
+
+def _init_fts(cursor):
+    """
+    Create the notes_fts full-text index and the triggers that keep it in sync
+    with every INSERT/UPDATE/DELETE on notes. Its external content is the
+    notes_fts_source view, which decompresses content via note_text() so the
+    index and snippet() work whether or not the column is compressed. The
+    cursor's connection must have the codec functions registered.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='notes_fts'"
+    ).fetchone()
 
-    # --- NOTES TABLE ---
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS notes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT,
-        input_source TEXT,
-        content TEXT,
-        concepts TEXT,
-        tags TEXT,
-        resources TEXT,
-        rewritten_notes TEXT,
-        evaluation TEXT,
-        total_score REAL,
-        indexing_status TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
+    CREATE VIEW IF NOT EXISTS notes_fts_source AS
+    SELECT id, title, note_text(content) AS content, concepts, tags FROM notes
     """)
 
-    # --- STYLE PROFILES TABLE ---
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS style_profiles (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        data_json TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        title, content, concepts, tags,
+        content='notes_fts_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
     )
     """)
 
-    conn.commit()
-    conn.close()
+    # One statement per execute() (not executescript) so this can run inside a migration transaction
+    for trigger in FTS_TRIGGERS:
+        cursor.execute(trigger)
+
+    if not exists:
+        # First run on an existing database: index the notes already stored
+        cursor.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+
+def _init_note_terms(cursor):
+    """
+    Create the normalized note_tags / note_concepts tables. Their (term, note_id)
+    primary keys act as an inverted index for tag filtering and facet counts.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='note_tags'"
+    ).fetchone()
+
+    for table, column in TERM_TABLES.values():
+        cursor.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {column} TEXT NOT NULL COLLATE NOCASE,
+            note_id INTEGER NOT NULL,
+            PRIMARY KEY ({column}, note_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_{table}_note_id ON {table}(note_id);
+        """)
+
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS notes_terms_ad AFTER DELETE ON notes BEGIN
+        DELETE FROM note_tags WHERE note_id = old.id;
+        DELETE FROM note_concepts WHERE note_id = old.id;
+    END
+    """)
+
+    if not exists:
+        # Backfill from the JSON columns of notes stored before these tables existed
+        for field, (table, column) in TERM_TABLES.items():
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {table} ({column}, note_id)
+                SELECT trim(j.value), n.id
+                FROM notes n, json_each(CASE WHEN json_valid(n.{field}) THEN n.{field} ELSE '[]' END) j
+                WHERE j.type = 'text' AND trim(j.value) != ''
+            """)
 
 #  NOTES CRUD OPERATIONS        
 
 def add_note(title: str, input_source: str, content: str, **kwargs) -> int:
     """Insert a new note into the database and return its ID."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        INSERT INTO notes (
+            title, input_source, content, concepts, tags, resources,
+            rewritten_notes, evaluation, total_score, indexing_status
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            title,
+            input_source,
+            codec.encode(content),
+            json.dumps(kwargs.get("concepts", [])),
+            json.dumps(kwargs.get("tags", [])),
+            codec.encode(json.dumps(kwargs.get("resources", {}))),
+            codec.encode(kwargs.get("rewritten_notes", "")),
+            codec.encode(json.dumps(kwargs.get("evaluation", {}))),
+            kwargs.get("total_score", 0.0),
+            kwargs.get("indexing_status", "pending")
+        ))
+        note_id = cursor.lastrowid
+        _sync_note_terms(conn, note_id, kwargs.get("tags", []), kwargs.get("concepts", []))
+        _record_revision(conn, note_id, None, {
+            "title": title,
+            "content": content,
+            "rewritten_notes": kwargs.get("rewritten_notes", ""),
+        })
+        return note_id
 
-    cursor.execute("""
-    INSERT INTO notes (
-        title, input_source, content, concepts, tags, resources,
-        rewritten_notes, evaluation, total_score, indexing_status
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        title,
-        input_source,
-        content,
-        json.dumps(kwargs.get("concepts", [])),
-        json.dumps(kwargs.get("tags", [])),
-        json.dumps(kwargs.get("resources", {})),
-        kwargs.get("rewritten_notes", ""),
-        json.dumps(kwargs.get("evaluation", {})),
-        kwargs.get("total_score", 0.0),
-        kwargs.get("indexing_status", "pending")
-    ))
-
-    note_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return note_id
+
+def add_notes_bulk(notes: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert a batch of note dicts (as produced by iter_notes) in one transaction.
+    IDs are reassigned; created_at/updated_at are kept when present. Returns the new IDs.
+    """
+    if not notes:
+        return []
+
+    with get_connection() as conn:
+        # Take the write lock up front so the reserved ID range can't be raced
+        conn.execute("BEGIN IMMEDIATE")
+        last_id = conn.execute("""
+            SELECT MAX(
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'notes'), 0),
+                COALESCE((SELECT MAX(id) FROM notes), 0)
+            )
+        """).fetchone()[0]
+        note_ids = list(range(last_id + 1, last_id + 1 + len(notes)))
+        now = datetime.now()
+
+        conn.executemany("""
+        INSERT INTO notes (
+            id, title, input_source, content, concepts, tags, resources,
+            rewritten_notes, evaluation, total_score, indexing_status,
+            created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                note_id,
+                note.get("title"),
+                note.get("input_source"),
+                codec.encode(note.get("content", "")),
+                json.dumps(note.get("concepts", [])),
+                json.dumps(note.get("tags", [])),
+                codec.encode(json.dumps(note.get("resources", {}))),
+                codec.encode(note.get("rewritten_notes", "")),
+                codec.encode(json.dumps(note.get("evaluation", {}))),
+                note.get("total_score", 0.0),
+                "pending",
+                note.get("created_at") or now,
+                note.get("updated_at") or now,
+            )
+            for note_id, note in zip(note_ids, notes)
+        ])
+
+        for field, (table, column) in TERM_TABLES.items():
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({column}, note_id) VALUES (?, ?)",
+                [
+                    (t.strip(), note_id)
+                    for note_id, note in zip(note_ids, notes)
+                    for t in note.get(field) or []
+                    if isinstance(t, str) and t.strip()
+                ],
+            )
+
+        # Base revision, as add_note records
+        conn.executemany(
+            "INSERT INTO note_revisions (note_id, revision, kind, data, created_at) VALUES (?, 1, 'full', ?, ?)",
+            [
+                (note_id, encode_snapshot({
+                    "title": note.get("title"),
+                    "content": note.get("content", ""),
+                    "rewritten_notes": note.get("rewritten_notes", ""),
+                }), now)
+                for note_id, note in zip(note_ids, notes)
+            ],
+        )
+    return note_ids
 
 
 def get_note_by_id(note_id: int) -> Optional[Dict[str, Any]]:
     """Retrieve a single note by its ID."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM notes WHERE id=?", (note_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM notes WHERE id=?", (note_id,)).fetchone()
     if row:
         return _note_row_to_dict(row)
     return None
 
 
+def get_notes_by_ids(note_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Retrieve many notes in one round trip, preserving the order of `note_ids`.
+    Duplicate and unknown IDs are skipped.
+    """
+    ids = list(dict.fromkeys(note_ids))
+    if not ids:
+        return []
+
+    rows = {}
+    with get_connection() as conn:
+        # Stay well below SQLite's bound-parameter limit for very large ID lists
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            for row in conn.execute(f"SELECT * FROM notes WHERE id IN ({placeholders})", batch):
+                rows[row[0]] = row
+
+    return [_note_row_to_dict(rows[i]) for i in ids if i in rows]
+
+
+def get_note_contents(note_ids: List[int]) -> Dict[int, str]:
+    """Decoded content of many notes in one round trip, without the other columns."""
+    ids = list(dict.fromkeys(note_ids))
+    contents = {}
+    with get_connection() as conn:
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            for note_id, content in conn.execute(
+                f"SELECT id, content FROM notes WHERE id IN ({placeholders})", batch
+            ):
+                contents[note_id] = codec.decode(content) or ""
+    return contents
+
+
 def get_all_notes() -> List[Dict[str, Any]]:
     """Retrieve all notes, newest first."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM notes ORDER BY created_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        rows = conn.execute("SELECT * FROM notes ORDER BY created_at DESC").fetchall()
     return [_note_row_to_dict(r) for r in rows]
 
 
+def iter_notes(batch_size: int = 200, after_id: int = 0):
+    """
+    Yield every note with id > after_id (oldest first), reading keyset pages of
+    `batch_size` rows so memory stays flat regardless of corpus size. The pooled
+    connection is released between pages, so a slow consumer (e.g. an export
+    stream) never holds one.
+    """
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM notes WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+            ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield _note_row_to_dict(row)
+        after_id = rows[-1][0]
+
+
+def count_notes(after_id: int = 0) -> int:
+    with get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM notes WHERE id > ?", (after_id,)).fetchone()[0]
+
+
+# Column projections available to get_notes_page(). "excerpt" and "content_length"
+# are computed in SQL so list views never ship the full content to the client.
+NOTE_FIELD_SQL = {
+    "id": "id",
+    "title": "title",
+    "input_source": "input_source",
+    "content": "content",
+    "excerpt": "note_excerpt(content, 200)",
+    "content_length": "length(note_text(content))",
+    "concepts": "concepts",
+    "tags": "tags",
+    "resources": "resources",
+    "rewritten_notes": "rewritten_notes",
+    "evaluation": "evaluation",
+    "total_score": "total_score",
+    "indexing_status": "indexing_status",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+NOTE_LIST_FIELDS = ["id", "title", "excerpt", "tags", "created_at", "updated_at"]
+
+_JSON_FIELD_DEFAULTS = {"concepts": "[]", "tags": "[]", "resources": "{}", "evaluation": "{}"}
+
+
+def encode_note_cursor(created_at: str, note_id: int) -> str:
+    """Encode the (created_at, id) keyset position of the last row of a page."""
+    raw = json.dumps([created_at, note_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_note_cursor(cursor: str):
+    """Inverse of encode_note_cursor(); raises ValueError on malformed input."""
+    try:
+        created_at, note_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), int(note_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def get_notes_page(
+    limit: Optional[int] = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+    concepts: Optional[List[str]] = None,
+    match_all: bool = True,
+):
+    """
+    Keyset-paginated note listing, newest first.
+    Only the requested `fields` are read and decoded. `tags`/`concepts` filter through
+    the note_tags/note_concepts index (all of them, or any with match_all=False).
+    Returns (notes, next_cursor), where next_cursor is None once the last page has been reached.
+    """
+    fields = list(fields or NOTE_FIELD_SQL.keys())
+    unknown = [f for f in fields if f not in NOTE_FIELD_SQL]
+    if unknown:
+        raise ValueError(f"Unknown note fields: {', '.join(unknown)}")
+
+    # created_at/id are always selected (last two columns) to build the next cursor
+    columns = [NOTE_FIELD_SQL[f] for f in fields] + ["created_at", "id"]
+    sql = f"SELECT {', '.join(columns)} FROM notes"
+    where, params = [], []
+
+    if cursor:
+        where.append("(created_at, id) < (?, ?)")
+        params.extend(decode_note_cursor(cursor))
+    for field, terms in (("tags", tags), ("concepts", concepts)):
+        if terms:
+            clause, term_params = _term_filter_sql(field, terms, match_all=match_all)
+            if clause:
+                where.append(clause)
+                params.extend(term_params)
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        # Fetch one extra row to know whether another page exists
+        sql += " LIMIT ?"
+        params.append(limit + 1)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_note_cursor(rows[-1][-2], rows[-1][-1])
+
+    notes = []
+    for row in rows:
+        note = {}
+        for field, value in zip(fields, row):
+            if field in COMPRESSED_COLUMNS:
+                value = codec.decode(value)
+            if field in _JSON_FIELD_DEFAULTS:
+                value = json.loads(value or _JSON_FIELD_DEFAULTS[field])
+            note[field] = value
+        notes.append(note)
+    return notes, next_cursor
+
+
 def update_note(note_id: int, **kwargs):
     """Update note fields dynamically based on provided kwargs."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
     fields, values = [], []
     for key, value in kwargs.items():
         if key in ["concepts", "tags", "resources", "evaluation"]:
             value = json.dumps(value)
+        if key in COMPRESSED_COLUMNS:
+            value = codec.encode(value)
         fields.append(f"{key} = ?")
         values.append(value)
 
@@ -115,23 +558,678 @@ def update_note(note_id: int, **kwargs):
     values.append(datetime.now())
     values.append(note_id)
 
-    cursor.execute(f"""
-    UPDATE notes
-    SET {', '.join(fields)}, updated_at = ?
-    WHERE id = ?
-    """, tuple(values))
+    with get_connection() as conn:
+        previous = None
+        if any(f in kwargs for f in REVISION_FIELDS):
+            row = conn.execute(
+                f"SELECT {', '.join(REVISION_FIELDS)} FROM notes WHERE id = ?", (note_id,)
+            ).fetchone()
+            previous = dict(zip(REVISION_FIELDS, map(codec.decode, row))) if row else None
+
+        conn.execute(f"""
+        UPDATE notes
+        SET {', '.join(fields)}, updated_at = ?
+        WHERE id = ?
+        """, tuple(values))
+        if previous is not None:
+            current = {f: kwargs.get(f, previous[f]) for f in REVISION_FIELDS}
+            _record_revision(conn, note_id, previous, current)
+        if "tags" in kwargs or "concepts" in kwargs:
+            _sync_note_terms(conn, note_id, kwargs.get("tags"), kwargs.get("concepts"))
+
 
-    conn.commit()
-    conn.close()
+def update_indexing_status(note_ids: List[int], status: str):
+    """Set indexing_status for many notes in one statement."""
+    if not note_ids:
+        return
+    with get_connection() as conn:
+        for start in range(0, len(note_ids), 500):
+            batch = note_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            conn.execute(
+                f"UPDATE notes SET indexing_status = ? WHERE id IN ({placeholders})",
+                [status, *batch],
+            )
 
 
 def delete_note(note_id: int):
     """Delete a note by ID."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM notes WHERE id=?", (note_id,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        conn.execute("DELETE FROM notes WHERE id=?", (note_id,))
+
+
+#  NOTE REVISIONS               
+
+# Every Nth revision is stored as a full snapshot, so rebuilding any revision
+# decompresses one snapshot plus at most N-1 deltas.
+REVISION_SNAPSHOT_EVERY = 16
+
+
+def _record_revision(conn, note_id: int, previous: Optional[Dict[str, Any]], current: Dict[str, Any]):
+    """
+    Append a revision for `current`. `previous` is the note's state before the
+    write (None for a new note); unchanged writes are not recorded.
+    """
+    if previous == current:
+        return
+
+    last = conn.execute(
+        "SELECT MAX(revision) FROM note_revisions WHERE note_id = ?", (note_id,)
+    ).fetchone()[0]
+
+    if last is None and previous is not None:
+        # Note predates revision tracking: keep its pre-update state as revision 1
+        conn.execute(
+            "INSERT INTO note_revisions (note_id, revision, kind, data) VALUES (?, 1, 'full', ?)",
+            (note_id, encode_snapshot(previous)),
+        )
+        last = 1
+
+    revision = (last or 0) + 1
+    if previous is None or (revision - 1) % REVISION_SNAPSHOT_EVERY == 0:
+        kind, data = "full", encode_snapshot(current)
+    else:
+        kind, data = "delta", encode_delta(previous, current)
+
+    conn.execute(
+        "INSERT INTO note_revisions (note_id, revision, kind, data, created_at) VALUES (?, ?, ?, ?, ?)",
+        (note_id, revision, kind, data, datetime.now()),
+    )
+
+
+def get_note_revisions(note_id: int) -> List[Dict[str, Any]]:
+    """List a note's revisions (oldest first) with their storage kind and compressed size."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT revision, kind, length(data), created_at
+            FROM note_revisions WHERE note_id = ? ORDER BY revision
+        """, (note_id,)).fetchall()
+    return [
+        {"revision": r[0], "kind": r[1], "stored_bytes": r[2], "created_at": r[3]}
+        for r in rows
+    ]
+
+
+def get_note_revision(note_id: int, revision: int) -> Optional[Dict[str, Any]]:
+    """Reconstruct title/content/rewritten_notes as of `revision` (nearest snapshot + deltas)."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT revision, kind, data, created_at FROM note_revisions
+            WHERE note_id = ? AND revision <= ? AND revision >= (
+                SELECT MAX(revision) FROM note_revisions
+                WHERE note_id = ? AND revision <= ? AND kind = 'full'
+            )
+            ORDER BY revision
+        """, (note_id, revision, note_id, revision)).fetchall()
+
+    if not rows or rows[-1][0] != revision:
+        return None
+
+    doc = decode_snapshot(rows[0][2])
+    for _, _, data, _ in rows[1:]:
+        doc = apply_delta(doc, data)
+    return {"note_id": note_id, "revision": revision, "created_at": rows[-1][3], **doc}
+
+
+#  COMPRESSION MAINTENANCE      
+
+def train_compression_dictionary(sample_limit: int = 500) -> Optional[int]:
+    """
+    Train a shared zlib dictionary from a random sample of stored column values and
+    make it the active one for new writes. Returns its id (None if there was nothing to learn).
+    Dictionary ids are one byte in the stored values, so at most 255 can ever be trained.
+    """
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(COMPRESSED_COLUMNS)} FROM notes ORDER BY RANDOM() LIMIT ?",
+            (sample_limit,),
+        ).fetchall()
+
+    samples = [codec.decode(v) for row in rows for v in row if v]
+    data = train_dictionary(samples)
+    if not data:
+        return None
+
+    with get_connection() as conn:
+        # AUTOINCREMENT never reuses ids, so the next one is the sequence + 1
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'codec_dictionaries'").fetchone()
+        if (row[0] if row else 0) >= 255:
+            raise ValueError("Compression dictionary ids are limited to 255; no more dictionaries can be trained")
+        dict_id = conn.execute("INSERT INTO codec_dictionaries (data) VALUES (?)", (data,)).lastrowid
+    codec.add_dictionary(dict_id, data)
+    return dict_id
+
+
+def _load_newest_dictionary() -> Optional[int]:
+    """Make the newest stored dictionary the active one; returns its id (None if none was trained)."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT id, data FROM codec_dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return None
+    codec.add_dictionary(row[0], row[1])
+    return row[0]
+
+
+def compress_existing_notes(batch_size: int = 200, retrain: bool = False) -> int:
+    """
+    Online migration of stored notes to the current codec settings. Rows are
+    re-encoded in small id-ordered batches, each in its own short transaction,
+    so readers and writers keep going. The newest trained dictionary is reused
+    (one is trained only if none exists, or when `retrain` is set), and values
+    already encoded with it are left alone, so an interrupted run can simply be
+    started again. Returns the number of rows rewritten.
+    """
+    if retrain or _load_newest_dictionary() is None:
+        train_compression_dictionary()
+    active = codec.active_dictionary
+
+    def reencode(value):
+        if isinstance(value, bytes) and value[:1] == MAGIC and value[1] == active:
+            return value
+        return codec.encode(codec.decode(value), force=True)
+
+    rewritten, last_id = 0, 0
+    columns = ", ".join(COMPRESSED_COLUMNS)
+    assignments = ", ".join(f"{c} = ?" for c in COMPRESSED_COLUMNS)
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, {columns} FROM notes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return rewritten
+
+            for note_id, *values in rows:
+                encoded = [reencode(v) for v in values]
+                if encoded != values:
+                    conn.execute(f"UPDATE notes SET {assignments} WHERE id = ?", (*encoded, note_id))
+                    rewritten += 1
+            last_id = rows[-1][0]
+
+
+#  CHUNK MANIFESTS              
+
+def get_chunk_manifests(note_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Indexed chunk IDs (in order), title and chunk metadata per note; notes never indexed are absent."""
+    manifests = {}
+    ids = list(dict.fromkeys(note_ids))
+    with get_connection() as conn:
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            for note_id, title, chunk_ids, metadata in conn.execute(
+                f"SELECT note_id, title, chunk_ids, metadata FROM chunk_manifests WHERE note_id IN ({placeholders})",
+                batch,
+            ):
+                manifests[note_id] = {
+                    "title": title,
+                    "chunk_ids": json.loads(chunk_ids),
+                    "metadata": json.loads(metadata) if metadata else None,
+                }
+    return manifests
+
+
+def save_chunk_manifests(manifests: Dict[int, Dict[str, Any]]):
+    """Record the chunk IDs (and note-level chunk metadata) now stored in Chroma for each note."""
+    now = datetime.now()
+    with get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO chunk_manifests (note_id, title, chunk_ids, updated_at, metadata) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(note_id) DO UPDATE SET
+                title = excluded.title, chunk_ids = excluded.chunk_ids,
+                updated_at = excluded.updated_at, metadata = excluded.metadata
+        """, [
+            (note_id, m.get("title"), json.dumps(m["chunk_ids"]), now,
+             json.dumps(m["metadata"], sort_keys=True) if m.get("metadata") is not None else None)
+            for note_id, m in manifests.items()
+        ])
+
+
+def delete_chunk_manifests(note_ids: Optional[List[int]] = None):
+    """Forget the indexed chunks of the given notes (of every note when None)."""
+    with get_connection() as conn:
+        if note_ids is None:
+            conn.execute("DELETE FROM chunk_manifests")
+            return
+        conn.executemany("DELETE FROM chunk_manifests WHERE note_id = ?", [(i,) for i in note_ids])
+
+
+def get_reindex_checkpoint(collection: str) -> Optional[Dict[str, Any]]:
+    with get_connection() as conn:
+        row = conn.execute("""
+            SELECT settings, last_note_id, notes_done, chunks_done, started_at, updated_at, finished_at
+            FROM reindex_checkpoints WHERE collection = ?
+        """, (collection,)).fetchone()
+    if row is None:
+        return None
+    return {
+        "collection": collection,
+        "settings": json.loads(row[0]),
+        "last_note_id": row[1],
+        "notes_done": row[2],
+        "chunks_done": row[3],
+        "started_at": row[4],
+        "updated_at": row[5],
+        "finished_at": row[6],
+    }
+
+
+def save_reindex_checkpoint(
+    collection: str,
+    settings: Dict[str, Any],
+    last_note_id: int,
+    notes_done: int,
+    chunks_done: int,
+    finished: bool = False,
+):
+    """Record re-index progress; a new `settings` (or last_note_id 0) restarts the clock."""
+    now = datetime.now()
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO reindex_checkpoints (
+                collection, settings, last_note_id, notes_done, chunks_done, started_at, updated_at, finished_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(collection) DO UPDATE SET
+                started_at = CASE WHEN excluded.last_note_id = 0 OR settings != excluded.settings
+                                  THEN excluded.started_at ELSE started_at END,
+                settings = excluded.settings,
+                last_note_id = excluded.last_note_id,
+                notes_done = excluded.notes_done,
+                chunks_done = excluded.chunks_done,
+                updated_at = excluded.updated_at,
+                finished_at = excluded.finished_at
+        """, (
+            collection, json.dumps(settings, sort_keys=True), last_note_id, notes_done, chunks_done,
+            now, now, now if finished else None,
+        ))
+
+
+def get_index_generation(collection: str) -> int:
+    """Current generation of a vector collection (0 if it was never written)."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT generation FROM index_generations WHERE collection = ?", (collection,)
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def bump_index_generation(collection: str) -> int:
+    """Mark a vector collection as changed; cached search results keyed on older generations go stale."""
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO index_generations (collection, generation) VALUES (?, 1)
+            ON CONFLICT(collection) DO UPDATE SET generation = generation + 1
+        """, (collection,))
+        return conn.execute(
+            "SELECT generation FROM index_generations WHERE collection = ?", (collection,)
+        ).fetchone()[0]
+
+
+def get_vector_outbox(limit: int = 500) -> List[Dict[str, Any]]:
+    """Oldest pending note changes for the vector index."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, note_id, op FROM vector_outbox ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+    return [{"id": r[0], "note_id": r[1], "op": r[2]} for r in rows]
+
+
+def clear_vector_outbox(up_to_id: int):
+    """Drop outbox entries that have been applied (every id <= up_to_id)."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM vector_outbox WHERE id <= ?", (up_to_id,))
+
+
+def count_vector_outbox() -> int:
+    with get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM vector_outbox").fetchone()[0]
+
+
+def get_existing_note_ids(note_ids: List[int]) -> set:
+    """The subset of `note_ids` that still exist."""
+    ids = list(dict.fromkeys(note_ids))
+    existing = set()
+    with get_connection() as conn:
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            existing.update(
+                r[0] for r in conn.execute(f"SELECT id FROM notes WHERE id IN ({placeholders})", batch)
+            )
+    return existing
+
+
+#  RELATED NOTES                
+
+def get_note_embeddings(model: str, note_ids: Optional[List[int]] = None) -> Dict[int, bytes]:
+    """Pooled note vectors (float32 bytes) computed with `model`, of the given notes or of all."""
+    with get_connection() as conn:
+        if note_ids is None:
+            return dict(conn.execute(
+                "SELECT note_id, vector FROM note_embeddings WHERE model = ? ORDER BY note_id", (model,)
+            ))
+        ids = list(dict.fromkeys(note_ids))
+        vectors = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            vectors.update(conn.execute(
+                f"SELECT note_id, vector FROM note_embeddings WHERE model = ? AND note_id IN ({placeholders})",
+                [model, *batch],
+            ))
+    return vectors
+
+
+def save_note_embeddings(model: str, embeddings: Dict[int, Any]):
+    """Store {note_id: (vector bytes, chunk_count)} as the notes' pooled vectors."""
+    now = datetime.now()
+    with get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO note_embeddings (note_id, model, vector, chunk_count, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(note_id) DO UPDATE SET
+                model = excluded.model, vector = excluded.vector,
+                chunk_count = excluded.chunk_count, updated_at = excluded.updated_at
+        """, [(note_id, model, vector, count, now) for note_id, (vector, count) in embeddings.items()])
+
+
+def delete_note_embeddings(note_ids: Optional[List[int]] = None):
+    """Forget the pooled vectors and neighbor lists of the given notes (of every note when None)."""
+    with get_connection() as conn:
+        if note_ids is None:
+            conn.execute("DELETE FROM note_embeddings")
+            conn.execute("DELETE FROM note_neighbors")
+            return
+        rows = [(i,) for i in note_ids]
+        conn.executemany("DELETE FROM note_embeddings WHERE note_id = ?", rows)
+        conn.executemany("DELETE FROM note_neighbors WHERE note_id = ?", rows)
+
+
+def get_neighbor_thresholds() -> Dict[int, Any]:
+    """(neighbor count, lowest neighbor score) per note that has neighbors."""
+    with get_connection() as conn:
+        return {
+            r[0]: (r[1], r[2])
+            for r in conn.execute("SELECT note_id, COUNT(*), MIN(score) FROM note_neighbors GROUP BY note_id")
+        }
+
+
+def get_notes_linking_to(note_ids: List[int]) -> set:
+    """Notes that list any of `note_ids` among their neighbors."""
+    ids = list(dict.fromkeys(note_ids))
+    linking = set()
+    with get_connection() as conn:
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            linking.update(r[0] for r in conn.execute(
+                f"SELECT DISTINCT note_id FROM note_neighbors WHERE neighbor_id IN ({placeholders})", batch
+            ))
+    return linking
+
+
+def save_note_neighbors(neighbors: Dict[int, List[Any]]):
+    """Replace the neighbor lists of the given notes with {note_id: [(neighbor_id, score), ...]}."""
+    with get_connection() as conn:
+        conn.executemany("DELETE FROM note_neighbors WHERE note_id = ?", [(i,) for i in neighbors])
+        conn.executemany(
+            "INSERT INTO note_neighbors (note_id, neighbor_id, score) VALUES (?, ?, ?)",
+            [(note_id, n, score) for note_id, pairs in neighbors.items() for n, score in pairs],
+        )
+
+
+def get_related_notes(note_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    """A note's stored neighbors, most similar first, with title, tags and created_at."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT n.id, n.title, n.tags, n.created_at, nn.score
+            FROM note_neighbors nn JOIN notes n ON n.id = nn.neighbor_id
+            WHERE nn.note_id = ?
+            ORDER BY nn.score DESC
+            LIMIT ?
+        """, (note_id, limit)).fetchall()
+    return [
+        {"id": r[0], "title": r[1], "tags": json.loads(r[2] or "[]"), "created_at": r[3], "score": r[4]}
+        for r in rows
+    ]
+
+
+#  FULL-TEXT SEARCH             
+
+# bm25() column weights for (title, content, concepts, tags)
+FTS_WEIGHTS = (10.0, 1.0, 5.0, 5.0)
+
+
+def build_fts_query(query: str, prefix: bool = False) -> str:
+    """
+    Translate a user query into an FTS5 MATCH expression.
+    "quoted text" becomes a phrase, `term*` a prefix query, and every other term
+    is quoted so FTS5 operators/punctuation in user input can't break the query.
+    With prefix=True the last bare term also matches as a prefix (search-as-you-type).
+    """
+    parts = []
+    tokens = re.findall(r'"([^"]*)"|(\S+)', query)
+    for i, (phrase, term) in enumerate(tokens):
+        if phrase.strip():
+            parts.append('"' + phrase.replace('"', '""') + '"')
+            continue
+        if not term:
+            continue
+        is_prefix = term.endswith("*") or (prefix and i == len(tokens) - 1)
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            parts.append(f'"{term}"' + ("*" if is_prefix else ""))
+    return " ".join(parts)
+
+
+# Search filter syntax: field -> key in the filters dict returned by parse_search_query()
+SEARCH_FILTER_FIELDS = {
+    "tag": "tags",
+    "concept": "concepts",
+    "source": "sources",
+    "after": "after",
+    "before": "before",
+}
+
+# Source type of a note, derived from input_source the way IngestionAgent.load_content
+# tells inputs apart; SOURCE_TYPE_SQL must stay in step with source_type()
+SOURCE_TYPES = ("url", "pdf", "text")
+SOURCE_TYPE_SQL = (
+    "CASE WHEN {col} GLOB 'http*' THEN 'url' WHEN {col} GLOB '*.pdf' THEN 'pdf' ELSE 'text' END"
+)
+
+
+def source_type(input_source: Optional[str]) -> str:
+    source = str(input_source or "")
+    if source.startswith("http"):
+        return "url"
+    if source.endswith(".pdf"):
+        return "pdf"
+    return "text"
+
+
+def _filter_timestamp(value: str) -> str:
+    """'2026-01-01' -> '2026-01-01 00:00:00', comparable with created_at; ValueError if not a date."""
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+def parse_search_query(query: str):
+    """
+    Split a search query into free text and filters:
+    'tag:ml after:2026-01-01 precision recall' -> ('precision recall', {"tags": ["ml"], "after": ...}).
+    tag:/concept: must all match, source: (url, pdf or text) matches any, after: is
+    inclusive and before: exclusive. Values may be quoted (tag:"machine learning").
+    Unknown prefixes stay part of the text. Raises ValueError on bad values.
+    """
+    filters: Dict[str, Any] = {}
+    words = []
+    for m in re.finditer(r'(\w+):(?:"([^"]*)"|([^\s"]+))|("[^"]*"|\S+)', query):
+        field = (m.group(1) or "").lower()
+        if field not in SEARCH_FILTER_FIELDS:
+            words.append(m.group(0))
+            continue
+        value = (m.group(2) if m.group(2) is not None else m.group(3)).strip()
+        if not value:
+            continue
+        key = SEARCH_FILTER_FIELDS[field]
+        if key in ("after", "before"):
+            filters[key] = _filter_timestamp(value)
+        elif key == "sources":
+            if value.lower() not in SOURCE_TYPES:
+                raise ValueError(f"Unknown source type: {value!r} (expected one of {', '.join(SOURCE_TYPES)})")
+            filters.setdefault(key, []).append(value.lower())
+        else:
+            filters.setdefault(key, []).append(value)
+    return " ".join(words), filters
+
+
+def _note_filter_sql(filters: Dict[str, Any], alias: str = ""):
+    """SQL condition (and params) restricting notes (optionally aliased) to those matching `filters`."""
+    col = (alias + ".") if alias else ""
+    clauses, params = [], []
+    for field in ("tags", "concepts"):
+        if filters.get(field):
+            sql, terms = _term_filter_sql(field, filters[field], id_column=f"{col}id")
+            if sql:
+                clauses.append(sql)
+                params.extend(terms)
+    if filters.get("sources"):
+        sources = list(dict.fromkeys(filters["sources"]))
+        clauses.append(
+            f"{SOURCE_TYPE_SQL.format(col=col + 'input_source')} IN ({', '.join('?' * len(sources))})"
+        )
+        params.extend(sources)
+    if filters.get("after"):
+        clauses.append(f"{col}created_at >= ?")
+        params.append(filters["after"])
+    if filters.get("before"):
+        clauses.append(f"{col}created_at < ?")
+        params.append(filters["before"])
+    return " AND ".join(clauses), params
+
+
+def get_filtered_note_ids(filters: Dict[str, Any]) -> List[int]:
+    """IDs of the notes matching search filters (see parse_search_query)."""
+    where, params = _note_filter_sql(filters)
+    with get_connection() as conn:
+        rows = conn.execute(f"SELECT id FROM notes WHERE {where or '1'}", params).fetchall()
+    return [r[0] for r in rows]
+
+
+def search_notes_fulltext(
+    query: str,
+    limit: int = 20,
+    prefix: bool = False,
+    snippet_tokens: int = 16,
+    filters: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    BM25-ranked keyword search over title/content/concepts/tags with highlighted snippets,
+    optionally restricted by search filters (see parse_search_query).
+    """
+    match = build_fts_query(query, prefix=prefix)
+    if not match:
+        return []
+    where, params = _note_filter_sql(filters or {}, alias="n")
+
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT n.id, n.title, n.tags, n.created_at, n.updated_at,
+                   snippet(notes_fts, 1, '<mark>', '</mark>', '…', ?) AS snippet,
+                   bm25(notes_fts, {', '.join(str(w) for w in FTS_WEIGHTS)}) AS score
+            FROM notes_fts
+            JOIN notes n ON n.id = notes_fts.rowid
+            WHERE notes_fts MATCH ? {"AND " + where if where else ""}
+            ORDER BY score
+            LIMIT ?
+        """, (snippet_tokens, match, *params, limit)).fetchall()
+
+    return [
+        {
+            "id": r[0],
+            "title": r[1],
+            "tags": json.loads(r[2] or "[]"),
+            "created_at": r[3],
+            "updated_at": r[4],
+            "snippet": r[5],
+            "score": r[6],  # bm25: lower = better match
+        }
+        for r in rows
+    ]
+
+
+#  TAGS / CONCEPTS INDEX        
+
+# JSON column on notes -> (normalized table, term column)
+TERM_TABLES = {
+    "tags": ("note_tags", "tag"),
+    "concepts": ("note_concepts", "concept"),
+}
+
+
+def _sync_note_terms(conn, note_id: int, tags: Optional[List[str]] = None, concepts: Optional[List[str]] = None):
+    """Replace a note's rows in note_tags/note_concepts; None leaves that table untouched."""
+    for field, terms in (("tags", tags), ("concepts", concepts)):
+        if terms is None:
+            continue
+        table, column = TERM_TABLES[field]
+        conn.execute(f"DELETE FROM {table} WHERE note_id = ?", (note_id,))
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {table} ({column}, note_id) VALUES (?, ?)",
+            [(t.strip(), note_id) for t in terms if isinstance(t, str) and t.strip()],
+        )
+
+
+def _term_filter_sql(field: str, terms: List[str], match_all: bool = True, id_column: str = "id"):
+    """
+    SQL fragment (and params) restricting `id_column` to notes carrying the given
+    tags/concepts; (None, []) when no term is left after dropping blanks.
+    """
+    table, column = TERM_TABLES[field]
+    # Terms are matched COLLATE NOCASE, so "ML" and "ml" must count as one term
+    unique = {}
+    for term in terms or []:
+        term = term.strip()
+        if term:
+            unique.setdefault(term.casefold(), term)
+    terms = list(unique.values())
+    if not terms:
+        return None, []
+    placeholders = ", ".join("?" * len(terms))
+    sql = f"{id_column} IN (SELECT note_id FROM {table} WHERE {column} IN ({placeholders}) GROUP BY note_id"
+    if match_all:
+        sql += f" HAVING COUNT(*) = {len(terms)}"
+    return sql + ")", terms
+
+
+def get_facet_counts(
+    field: str = "tags",
+    tags: Optional[List[str]] = None,
+    limit: Optional[int] = 50,
+) -> List[Dict[str, Any]]:
+    """
+    Count notes per tag (or concept), most frequent first.
+    If `tags` is given, counts are restricted to notes carrying all of them (drill-down).
+    """
+    if field not in TERM_TABLES:
+        raise ValueError(f"Unknown facet field: {field}")
+    table, column = TERM_TABLES[field]
+
+    sql = f"SELECT {column}, COUNT(*) AS n FROM {table}"
+    where, params = _term_filter_sql("tags", tags, id_column="note_id")
+    if where:
+        sql += " WHERE " + where
+    sql += f" GROUP BY {column} ORDER BY n DESC, {column}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{column: r[0], "count": r[1]} for r in rows]
 
 
 def _note_row_to_dict(row):
@@ -140,12 +1238,12 @@ def _note_row_to_dict(row):
         "id": row[0],
         "title": row[1],
         "input_source": row[2],
-        "content": row[3],
+        "content": codec.decode(row[3]),
         "concepts": json.loads(row[4] or "[]"),
         "tags": json.loads(row[5] or "[]"),
-        "resources": json.loads(row[6] or "{}"),
-        "rewritten_notes": row[7],
-        "evaluation": json.loads(row[8] or "{}"),
+        "resources": json.loads(codec.decode(row[6]) or "{}"),
+        "rewritten_notes": codec.decode(row[7]),
+        "evaluation": json.loads(codec.decode(row[8]) or "{}"),
         "total_score": row[9],
         "indexing_status": row[10],
         "created_at": row[11],
@@ -153,48 +1251,116 @@ def _note_row_to_dict(row):
     }
 
 #  STYLE PROFILE CRUD           
-def save_style_profiles(style_data: List[Dict[str, Any]]):
-    """Replace all style profiles with a new list of JSON profiles."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    # Store as one big JSON array
-    json_data = json.dumps(style_data, indent=2)
+def _profile_key(profile: Dict[str, Any], position: int) -> str:
+    """Profiles are keyed by profile_id; ones without an ID get a positional key."""
+    return profile.get("profile_id") or ("default" if position == 0 else f"profile_{position}")
 
-    cursor.execute("DELETE FROM style_profiles")
-    cursor.execute("""
-        INSERT INTO style_profiles (data_json, created_at, updated_at)
-        VALUES (?, ?, ?)
-    """, (json_data, datetime.now(), datetime.now()))
 
-    conn.commit()
-    conn.close()
+def _profile_row_to_dict(row) -> Dict[str, Any]:
+    profile = json.loads(row[0])
+    profile["version"] = row[1]
+    return profile
+
+
+def _upsert_style_profiles(conn, style_data: List[Dict[str, Any]]):
+    """
+    Upsert each profile into its own row and drop profiles not in the list.
+    A row's version is bumped only when its content or position actually changed.
+    """
+    now = datetime.now()
+    keys = []
+    for position, profile in enumerate(style_data):
+        profile = {k: v for k, v in profile.items() if k != "version"}
+        key = _profile_key(profile, position)
+        profile["profile_id"] = key
+        keys.append(key)
+        conn.execute("""
+            INSERT INTO style_profile_items (profile_id, data_json, version, position, created_at, updated_at)
+            VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT(profile_id) DO UPDATE SET
+                data_json = excluded.data_json,
+                version = style_profile_items.version + 1,
+                position = excluded.position,
+                updated_at = excluded.updated_at
+            WHERE json(style_profile_items.data_json) != json(excluded.data_json)
+               OR style_profile_items.position != excluded.position
+        """, (key, json.dumps(profile), position, now, now))
+
+    placeholders = ", ".join("?" * len(keys))
+    conn.execute(f"DELETE FROM style_profile_items WHERE profile_id NOT IN ({placeholders})", keys)
+
+
+def save_style_profiles(style_data: List[Dict[str, Any]]):
+    """Replace all style profiles with a new list of JSON profiles (one row per profile)."""
+    with get_connection() as conn:
+        _upsert_style_profiles(conn, style_data)
 
 
 def get_style_profiles() -> List[Dict[str, Any]]:
-    """Retrieve all stored style profiles as JSON list."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT data_json FROM style_profiles ORDER BY created_at DESC LIMIT 1")
-    row = cursor.fetchone()
-    conn.close()
+    """Retrieve all stored style profiles as JSON list, each with its current version."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT data_json, version FROM style_profile_items ORDER BY position"
+        ).fetchall()
+    return [_profile_row_to_dict(r) for r in rows]
 
-    if row and row[0]:
-        return json.loads(row[0])
-    return []
+
+def get_style_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a single style profile by its profile_id."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT data_json, version FROM style_profile_items WHERE profile_id = ?",
+            (profile_id,),
+        ).fetchone()
+    return _profile_row_to_dict(row) if row else None
 
 
 def update_style_profiles(style_data: List[Dict[str, Any]]):
-    """Update the style profiles JSON while keeping timestamps."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    """Update the style profiles from a full list; unchanged profiles keep their version."""
+    with get_connection() as conn:
+        _upsert_style_profiles(conn, style_data)
+
+
+def patch_style_profile(
+    profile_id: str,
+    patch: Dict[str, Any],
+    expected_version: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Apply an RFC 7396 JSON merge patch to one profile inside SQLite (json_patch),
+    so only that row is read and rewritten. Nested sections merge key by key and
+    null removes a key. Returns the updated profile, or None if it doesn't exist.
+    Raises ValueError if `expected_version` no longer matches (concurrent edit).
+    """
+    patch = {k: v for k, v in patch.items() if k not in ("version", "profile_id")}
+    sql = """
+        UPDATE style_profile_items
+        SET data_json = json_patch(data_json, ?), version = version + 1, updated_at = ?
+        WHERE profile_id = ?
+    """
+    params = [json.dumps(patch), datetime.now(), profile_id]
+    if expected_version is not None:
+        sql += " AND version = ?"
+        params.append(expected_version)
+
+    with get_connection() as conn:
+        updated = conn.execute(sql, params).rowcount
+        row = conn.execute(
+            "SELECT data_json, version FROM style_profile_items WHERE profile_id = ?",
+            (profile_id,),
+        ).fetchone()
+
+    if row is None:
+        return None
+    if not updated:
+        raise ValueError(
+            f"Style profile '{profile_id}' is at version {row[1]}, expected {expected_version}"
+        )
+    return _profile_row_to_dict(row)
 
-    json_data = json.dumps(style_data, indent=2)
-    cursor.execute("""
-        UPDATE style_profiles
-        SET data_json = ?, updated_at = ?
-        WHERE id = (SELECT id FROM style_profiles ORDER BY created_at DESC LIMIT 1)
-    """, (json_data, datetime.now()))
 
-    conn.commit()
-    conn.close()
+def delete_style_profiles():
+    """Delete all style profiles."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM style_profile_items")
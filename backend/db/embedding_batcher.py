@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Micro-batching of query embeddings. Every /search and /chat request embeds one
+# query, and single-row forward passes leave most of the CPU idle. BatchingEmbeddings
+# queues embed_query() calls instead: a worker thread takes the oldest query, waits up
+# to EMBEDDING_BATCH_WAIT_MS for more (at most EMBEDDING_BATCH_MAX_SIZE), embeds them
+# with one embed_documents() call on the wrapped model and resolves each caller's
+# future. Queries that arrive while a batch is running form the next batch, so even
+# with a zero wait concurrent callers are coalesced. The wait only applies while the
+# previous batch had company, so a lone caller on an idle server never pays it.
+#
+# embed_documents() calls are already batched and go straight to the model. Queries are
+# embedded as documents, which is the same thing for sentence-transformers models
+# (no query instruction); turn batching off (EMBEDDING_BATCHING=0) for models where
+# it isn't.
+
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+
+class BatchingEmbeddings(Embeddings):
+    """LangChain Embeddings that coalesce concurrent embed_query() calls into batches."""
+
+    def __init__(self, base: Embeddings, max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS):
+        self.base = base
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.batches = 0   # batches run so far
+        self.queries = 0   # queries embedded in them
+
+    @property
+    def client(self):
+        # Underlying SentenceTransformer, for callers that need the raw model
+        return getattr(self.base, "client", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        last_size = 1
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + (self.max_wait if last_size > 1 else 0.0)
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._embed(batch)
+            last_size = len(batch)
+
+    def _embed(self, batch: List[Tuple[str, Future]]):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.base.embed_documents(texts)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.queries += len(batch)
+        for text, future in batch:
+            future.set_result(list(vectors[text]))
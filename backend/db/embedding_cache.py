@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Persistent, content-addressed embedding cache.
+#   <cache_dir>/<model>/vectors.f32   memory-mapped float32 matrix, one row per slot
+#   <cache_dir>/<model>/index.sqlite  sha1(model, text) -> slot, plus an LRU clock
+# Readers in this or another process never get another text's vector:
+#   - a slot is only written once no committed row points at it: writers first
+#     commit its reservation (taking it from the free list or the unused tail, or
+#     deleting the evicted row that held it), then write the vector, then commit the
+#     new row;
+#   - a reader confirms each (key, slot) row still exists after reading the vector
+#     (when bumping its LRU clock), so a slot evicted and reused mid-read is a miss.
+# A crash between reserving and committing leaks those slots, never corrupts one.
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "db/embedding_cache")
+EMBEDDING_CACHE_CAPACITY = int(os.getenv("EMBEDDING_CACHE_CAPACITY", "50000"))
+
+
+class EmbeddingCache:
+    """Fixed-capacity on-disk cache of embeddings for one model, with LRU eviction."""
+
+    def __init__(self, model_name: str, directory: str = EMBEDDING_CACHE_DIR,
+                 capacity: int = EMBEDDING_CACHE_CAPACITY):
+        self.model_name = model_name
+        self.dir = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+        os.makedirs(self.dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._index = sqlite3.connect(
+            os.path.join(self.dir, "index.sqlite"), timeout=30, check_same_thread=False
+        )
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.executescript("""
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            slot INTEGER NOT NULL UNIQUE,
+            last_used INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+        CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        # First slot never handed out (caches from before this was tracked filled slots densely)
+        self._index.execute(
+            "INSERT OR IGNORE INTO meta (name, value) SELECT 'next_slot', COALESCE(MAX(slot) + 1, 0) FROM entries"
+        )
+        self._index.commit()
+        meta = dict(self._index.execute("SELECT name, value FROM meta"))
+        # An existing matrix keeps the capacity it was created with
+        self.capacity = meta.get("capacity", capacity)
+        self.dim: Optional[int] = meta.get("dim")
+        self._clock = self._index.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        self._vectors = self._open_vectors() if self.dim else None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _open_vectors(self):
+        path = os.path.join(self.dir, "vectors.f32")
+        mode = "r+" if os.path.exists(path) else "w+"
+        return np.memmap(path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for `texts` (None for misses); hits are marked recently used."""
+        if self._vectors is None or not texts:
+            return [None] * len(texts)
+
+        keys = [self.key(t) for t in texts]
+        with self._lock:
+            slots = {}
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                slots.update(self._index.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+                ))
+            read = {k: np.array(self._vectors[slot]) for k, slot in slots.items()}
+            if slots:
+                self._clock += 1
+                touched = self._index.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ? AND slot = ?",
+                    [(self._clock, k, slot) for k, slot in slots.items()],
+                ).rowcount
+                if touched != len(slots):
+                    # Some rows were evicted while we read: their slots may hold another vector now
+                    for k, slot in slots.items():
+                        if not self._index.execute(
+                            "SELECT 1 FROM entries WHERE key = ? AND slot = ?", (k, slot)
+                        ).fetchone():
+                            del read[k]
+                self._index.commit()
+            vectors = [read.get(k) for k in keys]
+
+        found = sum(v is not None for v in vectors)
+        self.hits += found
+        self.misses += len(vectors) - found
+        return vectors
+
+    def put_many(self, texts: List[str], vectors):
+        """Store vectors, evicting the least recently used entries when full."""
+        if not texts:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        entries = dict(zip((self.key(t) for t in texts), vectors))
+
+        with self._lock:
+            if self._vectors is None:
+                self.dim = int(vectors.shape[1])
+                self._index.executemany(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                    [("dim", self.dim), ("capacity", self.capacity)],
+                )
+                self._index.commit()
+                self._vectors = self._open_vectors()
+
+            new_keys, slots = self._reserve_slots(list(entries))
+            if not new_keys:
+                return
+            for key, slot in zip(new_keys, slots):
+                self._vectors[slot] = entries[key]
+            self._vectors.flush()
+
+            self._clock += 1
+            self._index.execute("BEGIN IMMEDIATE")
+            try:
+                unused = []
+                for key, slot in zip(new_keys, slots):
+                    inserted = self._index.execute(
+                        "INSERT OR IGNORE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                        (key, slot, self._clock),
+                    ).rowcount
+                    if not inserted:  # another process cached the same text meanwhile
+                        unused.append((slot,))
+                self._index.executemany("INSERT INTO free_slots (slot) VALUES (?)", unused)
+                self._index.commit()
+            except Exception:
+                self._index.rollback()
+                raise
+
+    def _reserve_slots(self, keys: List[str]):
+        """
+        (keys not cached yet, a slot for each), evicting the least recently used
+        entries when full. Committed before returning, so no row points at the slots.
+        """
+        self._index.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ", ".join("?" * len(keys))
+            existing = {k for (k,) in self._index.execute(
+                f"SELECT key FROM entries WHERE key IN ({placeholders})", keys
+            )}
+            new_keys = [k for k in keys if k not in existing][:self.capacity]
+
+            slots = [slot for (slot,) in self._index.execute(
+                "SELECT slot FROM free_slots LIMIT ?", (len(new_keys),)
+            )]
+            self._index.executemany("DELETE FROM free_slots WHERE slot = ?", [(slot,) for slot in slots])
+
+            next_slot = self._index.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0]
+            fresh = min(self.capacity - next_slot, len(new_keys) - len(slots))
+            if fresh > 0:
+                slots.extend(range(next_slot, next_slot + fresh))
+                self._index.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (next_slot + fresh,))
+
+            shortfall = len(new_keys) - len(slots)
+            if shortfall > 0:
+                evicted = self._index.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (shortfall,)
+                ).fetchall()
+                self._index.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in evicted])
+                slots.extend(slot for _, slot in evicted)
+            self._index.commit()
+        except Exception:
+            self._index.rollback()
+            raise
+        return new_keys[:len(slots)], slots
+
+    def embed(self, texts: List[str], compute: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Return embeddings for `texts`, running `compute` only on texts not cached yet."""
+        vectors = self.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            computed = compute(missing)
+            self.put_many(missing, computed)
+            by_text = dict(zip(missing, computed))
+            vectors = [by_text[t] if v is None else v for t, v in zip(texts, vectors)]
+        return [list(map(float, v)) for v in vectors]
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain Embeddings that consult an EmbeddingCache before the wrapped model."""
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    @property
+    def client(self):
+        # Underlying SentenceTransformer, for callers that need the raw model
+        return getattr(self.base, "client", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed(list(texts), self.base.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cache.embed([text], lambda t: [self.base.embed_query(t[0])])[0]
+
+
+def keybert_backend(embeddings: Embeddings):
+    """KeyBERT backend that embeds through `embeddings` (and therefore through the cache)."""
+    from keybert.backend import BaseEmbedder
+
+    class _CachedBackend(BaseEmbedder):
+        def embed(self, documents, verbose: bool = False) -> np.ndarray:
+            return np.asarray(embeddings.embed_documents(list(documents)), dtype=np.float32)
+
+    return _CachedBackend()
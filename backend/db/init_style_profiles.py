@@ -73,16 +73,18 @@ def insert_default_style_profile():
         }
     ]
 
-    json_data = json.dumps(default_profile, indent=2)
+    # One row per profile in style_profile_items (created by init_db)
+    profile = default_profile[0]
+    profile["profile_id"] = "default"
 
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    cursor.execute("DELETE FROM style_profiles")
+    cursor.execute("DELETE FROM style_profile_items")
     cursor.execute("""
-        INSERT INTO style_profiles (data_json, created_at, updated_at)
-        VALUES (?, ?, ?)
-    """, (json_data, datetime.now(), datetime.now()))
+        INSERT INTO style_profile_items (profile_id, data_json, version, position, created_at, updated_at)
+        VALUES (?, ?, 1, 0, ?, ?)
+    """, (profile["profile_id"], json.dumps(profile), datetime.now(), datetime.now()))
 
     conn.commit()
     conn.close()
@@ -0,0 +1,271 @@
+import sys
+from typing import Callable, List, Tuple, Union
+
+
+def _fts_over_decompressing_view(conn):
+    """Re-create notes_fts over the notes_fts_source view so compressed content stays searchable."""
+    from db.database_manager import _init_fts
+
+    for trigger in ("notes_fts_ai", "notes_fts_ad", "notes_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS notes_fts")
+    _init_fts(conn.cursor())
+
+
+def _vector_outbox(conn):
+    """
+    vector_outbox queues note changes not yet applied to Chroma (drained by
+    db/vector_sync.py): deletes, and edits of anything chunks are built from or carry
+    as metadata (title, content, tags, concepts, input_source). Manifests remember
+    chunk metadata. Every note is queued so the background sync gives chunks indexed
+    before this migration their filter metadata (a metadata-only update for notes
+    with a manifest, nothing is re-embedded for them).
+    """
+    # Databases created while init_db() made chunk_manifests already have the column
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chunk_manifests)")}
+    if "metadata" not in columns:
+        conn.execute("ALTER TABLE chunk_manifests ADD COLUMN metadata TEXT")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS vector_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        note_id INTEGER NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    # Databases from before this migration may have an outbox that only watched title/content
+    for trigger in ("notes_outbox_ad", "notes_outbox_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("""
+    CREATE TRIGGER notes_outbox_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO vector_outbox (note_id, op) VALUES (old.id, 'delete');
+    END
+    """)
+    # note_text() is registered on every connection by database_manager._on_connect
+    conn.execute("""
+    CREATE TRIGGER notes_outbox_au AFTER UPDATE OF title, content, tags, concepts, input_source ON notes
+    WHEN old.title IS NOT new.title
+      OR note_text(old.content) IS NOT note_text(new.content)
+      OR old.tags IS NOT new.tags
+      OR old.concepts IS NOT new.concepts
+      OR old.input_source IS NOT new.input_source BEGIN
+        INSERT INTO vector_outbox (note_id, op) VALUES (new.id, 'upsert');
+    END
+    """)
+    conn.execute("INSERT INTO vector_outbox (note_id, op) SELECT id, 'upsert' FROM notes ORDER BY id")
+
+
+# Versioned schema migrations, applied in order on top of the tables created by
+# init_db(). The applied version is tracked in SQLite's PRAGMA user_version.
+# Append new migrations to the end of the list; never edit or reorder applied ones.
+# New tables are created here, not in init_db(), so each has exactly one definition.
+#
+#   (version, description, [SQL statement or callable(conn), ...])
+Step = Union[str, Callable]
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "index notes on created_at for newest-first listing and keyset pages", [
+        "CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at)",
+    ]),
+    (2, "index notes on updated_at and indexing_status", [
+        "CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notes_indexing_status ON notes(indexing_status)",
+    ]),
+    (3, "index style profiles on list position", [
+        "CREATE INDEX IF NOT EXISTS idx_style_profile_items_position ON style_profile_items(position)",
+    ]),
+    (4, "column compression: codec dictionaries and FTS over decompressed content", [
+        """
+        CREATE TABLE IF NOT EXISTS codec_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        _fts_over_decompressing_view,
+    ]),
+    # chunk_manifests: which vector IDs each note currently has in Chroma
+    (5, "chunk manifests for incremental re-indexing", [
+        """
+        CREATE TABLE IF NOT EXISTS chunk_manifests (
+            note_id INTEGER PRIMARY KEY,
+            title TEXT,
+            chunk_ids TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    # index_generations: bumped whenever a vector collection changes; keys the search
+    # cache. Deleting a note bumps the "notes" collection (chroma_manager.COLLECTION_NAME)
+    (6, "vector index generations for search cache keys", [
+        """
+        CREATE TABLE IF NOT EXISTS index_generations (
+            collection TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notes_generation_ad AFTER DELETE ON notes BEGIN
+            INSERT INTO index_generations (collection, generation) VALUES ('notes', 1)
+            ON CONFLICT(collection) DO UPDATE SET generation = generation + 1;
+        END
+        """,
+    ]),
+    # reindex_checkpoints: progress of a full vector index rebuild, for resuming (db/reindex.py)
+    (7, "re-index checkpoints", [
+        """
+        CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+            collection TEXT PRIMARY KEY,
+            settings TEXT NOT NULL,
+            last_note_id INTEGER NOT NULL DEFAULT 0,
+            notes_done INTEGER NOT NULL DEFAULT 0,
+            chunks_done INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+    ]),
+    (8, "vector outbox and chunk metadata for filtered vector search", [
+        _vector_outbox,
+    ]),
+    # note_embeddings: one pooled vector per indexed note (float32 bytes); note_neighbors:
+    # its top-k most similar notes. Both maintained by db/related_notes.py. Rows of deleted
+    # notes are left for the vector sync to remove (which also refills the lists that
+    # pointed at them); readers join on notes so they never show.
+    (9, "related notes: pooled note embeddings and kNN neighbor lists", [
+        """
+        CREATE TABLE IF NOT EXISTS note_embeddings (
+            note_id INTEGER PRIMARY KEY,
+            model TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            chunk_count INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS note_neighbors (
+            note_id INTEGER NOT NULL,
+            neighbor_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (note_id, neighbor_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_note_neighbors_neighbor ON note_neighbors(neighbor_id)",
+        # Existing notes have no pooled vector yet: the background sync pools them from
+        # their stored chunk vectors (nothing is re-embedded) and builds their lists
+        """
+        INSERT INTO vector_outbox (note_id, op)
+        SELECT id, 'upsert' FROM notes
+        WHERE id NOT IN (SELECT note_id FROM vector_outbox WHERE op = 'upsert')
+        ORDER BY id
+        """,
+    ]),
+]
+
+# Hot queries and the index each must use (checked with EXPLAIN QUERY PLAN)
+HOT_QUERIES = [
+    ("get_all_notes", "SELECT * FROM notes ORDER BY created_at DESC", (), "idx_notes_created_at"),
+    (
+        "get_notes_page",
+        "SELECT id, title, created_at, id FROM notes WHERE (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        ("2030-01-01", 0, 51),
+        "idx_notes_created_at",
+    ),
+    (
+        "pending notes",
+        "SELECT id FROM notes WHERE indexing_status = ?",
+        ("pending",),
+        "idx_notes_indexing_status",
+    ),
+    (
+        "recently updated notes",
+        "SELECT id FROM notes ORDER BY updated_at DESC LIMIT 20",
+        (),
+        "idx_notes_updated_at",
+    ),
+    (
+        "get_style_profiles",
+        "SELECT data_json, version FROM style_profile_items ORDER BY position",
+        (),
+        "idx_style_profile_items_position",
+    ),
+]
+
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn=None) -> int:
+    """
+    Apply every migration newer than the database's user_version, each in its
+    own transaction. Returns the resulting schema version.
+    """
+    if conn is None:
+        from db.database_manager import get_connection
+        with get_connection() as conn:
+            return run_migrations(conn)
+
+    conn.commit()
+    current = get_schema_version(conn)
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"✅ Applied migration {version}: {description}")
+        current = version
+    return current
+
+
+def explain_query_plan(conn, sql: str, params=()) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans(conn=None) -> List[str]:
+    """
+    Verify each HOT_QUERIES entry uses its index and needs no temp B-tree sort.
+    Returns a list of problems (empty when every plan is as expected).
+    """
+    if conn is None:
+        from db.database_manager import get_connection
+        with get_connection() as conn:
+            return check_query_plans(conn)
+
+    problems = []
+    for name, sql, params, index in HOT_QUERIES:
+        plan = explain_query_plan(conn, sql, params)
+        text = " | ".join(plan)
+        if index not in text:
+            problems.append(f"{name}: expected index {index}, plan was: {text}")
+        elif "USE TEMP B-TREE" in text:
+            problems.append(f"{name}: sorts with a temp B-tree, plan was: {text}")
+    return problems
+
+
+# Run from ./backend:  python -m db.migrations [--check]
+if __name__ == "__main__":
+    from db.database_manager import init_db
+
+    init_db()
+    print(f"Schema version: {run_migrations()}")
+    if "--check" in sys.argv:
+        problems = check_query_plans()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ All hot queries use their indexes.")
@@ -0,0 +1,170 @@
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Chroma
+
+from db.embedding_batcher import BatchingEmbeddings
+from db.embedding_cache import CachedEmbeddings, EmbeddingCache, keybert_backend
+from db.vector_index import ChromaVectorIndex, HnswVectorIndex, VectorIndex
+
+# Process-wide registry of embedding models and vector stores.
+# Each model / store is built once (under a lock) and the same handle is shared by
+# chroma_manager, the ingestion agent and KeyBERT. Inference on the shared
+# SentenceTransformer is read-only, so concurrent callers don't need their own copy.
+# Embeddings go through the on-disk EmbeddingCache unless EMBEDDING_CACHE=0, so text
+# that was embedded before (by any of those callers) never hits the model again.
+# EMBEDDING_BACKEND picks how the model runs: "torch" (HuggingFaceEmbeddings),
+# "onnx" or "onnx-int8" (onnxruntime on CPU, see db/onnx_embeddings.py). Concurrent
+# query embeddings are coalesced into batches (db/embedding_batcher.py) unless
+# EMBEDDING_BATCHING=0.
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1").lower() not in ("0", "false", "off")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "1").lower() not in ("0", "false", "off")
+
+_lock = threading.RLock()
+_models: Dict[Tuple[str, str], Embeddings] = {}
+_embeddings: Dict[str, Embeddings] = {}
+_keybert: Dict[str, object] = {}
+_stores: Dict[Tuple[str, str, str], Chroma] = {}
+_indexes: Dict[Tuple[str, str, str], VectorIndex] = {}
+
+
+def canonical_model_name(model_name: str) -> str:
+    """'all-MiniLM-L6-v2' and 'sentence-transformers/all-MiniLM-L6-v2' are the same model."""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def get_model(model_name: str = DEFAULT_EMBEDDING_MODEL, backend: Optional[str] = None) -> Embeddings:
+    """Shared, uncached LangChain wrapper around the model (loaded on first use)."""
+    name = canonical_model_name(model_name)
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    key = (name, backend)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                if backend == "torch":
+                    model = HuggingFaceEmbeddings(model_name=name)
+                else:
+                    from db.onnx_embeddings import OnnxEmbeddings
+                    model = OnnxEmbeddings(name, quantize=(backend == "onnx-int8"))
+                _models[key] = model
+    return model
+
+
+def get_embeddings(model_name: str = DEFAULT_EMBEDDING_MODEL) -> Embeddings:
+    """Shared embeddings for a model: query micro-batching behind the persistent embedding cache."""
+    name = canonical_model_name(model_name)
+    embeddings = _embeddings.get(name)
+    if embeddings is None:
+        with _lock:
+            embeddings = _embeddings.get(name)
+            if embeddings is None:
+                embeddings = get_model(name)
+                if EMBEDDING_BATCHING:
+                    # behind the cache, so only cache misses wait for a batch
+                    embeddings = BatchingEmbeddings(embeddings)
+                if EMBEDDING_CACHE_ENABLED:
+                    # vectors from different backends differ slightly, so each gets its own cache
+                    cache_name = name if EMBEDDING_BACKEND == "torch" else f"{name}@{EMBEDDING_BACKEND}"
+                    embeddings = CachedEmbeddings(embeddings, EmbeddingCache(cache_name))
+                _embeddings[name] = embeddings
+    return embeddings
+
+
+def get_keybert(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Shared KeyBERT instance that embeds documents and candidates through get_embeddings()."""
+    from keybert import KeyBERT
+
+    name = canonical_model_name(model_name)
+    model = _keybert.get(name)
+    if model is None:
+        with _lock:
+            model = _keybert.get(name)
+            if model is None:
+                model = KeyBERT(model=keybert_backend(get_embeddings(name)))
+                _keybert[name] = model
+    return model
+
+
+def get_vector_store(
+    collection_name: str,
+    persist_directory: str,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+) -> Chroma:
+    """Shared persistent Chroma store for a collection (one client per process)."""
+    key = (collection_name, os.path.abspath(persist_directory), canonical_model_name(model_name))
+    store = _stores.get(key)
+    if store is None:
+        with _lock:
+            store = _stores.get(key)
+            if store is None:
+                os.makedirs(persist_directory, exist_ok=True)
+                store = Chroma(
+                    collection_name=collection_name,
+                    embedding_function=get_embeddings(model_name),
+                    persist_directory=persist_directory,
+                )
+                _stores[key] = store
+    return store
+
+
+def get_vector_index(
+    collection_name: str,
+    persist_directory: str,
+    backend: str = "chroma",
+    dtype: str = "float32",
+    build: Optional[Callable[[VectorIndex], None]] = None,
+) -> VectorIndex:
+    """
+    Shared vector index of a collection (see db/vector_index.py). Side indexes live in
+    <persist_directory>/<collection>.<dtype> (numpy) or <collection>.hnsw; `build`
+    runs once when one is first opened.
+    """
+    key = (collection_name, os.path.abspath(persist_directory), f"{backend}:{dtype}")
+    index = _indexes.get(key)
+    if index is None:
+        with _lock:
+            index = _indexes.get(key)
+            if index is None:
+                if backend == "chroma":
+                    index = ChromaVectorIndex(get_vector_store(collection_name, persist_directory)._collection)
+                elif backend == "numpy":
+                    from db.quantized_index import QuantizedIndex
+                    index = QuantizedIndex(os.path.join(persist_directory, f"{collection_name}.{dtype}"), dtype)
+                elif backend == "hnsw":
+                    index = HnswVectorIndex(os.path.join(persist_directory, f"{collection_name}.hnsw"))
+                else:
+                    raise ValueError(f"Unknown vector index backend: {backend}")
+                if build is not None:
+                    build(index)
+                _indexes[key] = index
+    return index
+
+
+def forget_collection(collection_name: str, persist_directory: str):
+    """Drop cached handles of one collection (after it was deleted), so the next get re-creates it."""
+    path = os.path.abspath(persist_directory)
+    with _lock:
+        for cache in (_stores, _indexes):
+            for key in [k for k in cache if k[0] == collection_name and k[1] == path]:
+                del cache[key]
+
+
+def clear_registry():
+    """Drop all cached handles (e.g. after changing the embedding model)."""
+    with _lock:
+        _stores.clear()
+        _indexes.clear()
+        _keybert.clear()
+        _embeddings.clear()
+        _models.clear()
@@ -0,0 +1,126 @@
+import inspect
+import os
+import re
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Sentence-transformers models (BERT + mean pooling + L2 normalisation, e.g.
+# all-MiniLM-L6-v2) run as an exported ONNX graph on onnxruntime's CPU provider,
+# optionally with int8 dynamic quantization of the weights. Needs `onnxruntime`;
+# exporting the graph the first time also needs torch + transformers (already
+# installed with sentence-transformers).
+#
+#   <ONNX_MODEL_DIR>/<model>/model.onnx        exported fp32 graph + tokenizer files
+#   <ONNX_MODEL_DIR>/<model>/model.int8.onnx   dynamic-quantized copy
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "db/onnx_models")
+MAX_SEQ_LENGTH = 256   # all-MiniLM-L6-v2's sentence-transformers max_seq_length
+BATCH_SIZE = 32
+
+
+def _model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+
+def export_model(model_name: str, quantize: bool = False) -> str:
+    """Export `model_name` to ONNX (and an int8 copy if asked) unless already done; returns the graph path."""
+    directory = _model_dir(model_name)
+    fp32_path = os.path.join(directory, "model.onnx")
+    int8_path = os.path.join(directory, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        os.makedirs(directory, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        class Encoder(torch.nn.Module):
+            # Exactly the graph inputs: the exporter would otherwise pass every optional
+            # forward() argument positionally, which newer transformers reject
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask, token_type_ids):
+                return self.model(
+                    input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+                ).last_hidden_state
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        inputs = ("input_ids", "attention_mask", "token_type_ids")
+        # The TorchScript exporter: newer torch defaults to the dynamo one, which needs onnxscript
+        legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        torch.onnx.export(
+            Encoder(),
+            tuple(sample[name] for name in inputs),
+            fp32_path,
+            input_names=list(inputs),
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in (*inputs, "last_hidden_state")},
+            opset_version=14,
+            **legacy,
+        )
+        tokenizer.save_pretrained(directory)
+
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    return int8_path if quantize else fp32_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """LangChain Embeddings running a sentence-transformers model on onnxruntime."""
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        path = export_model(model_name, quantize=quantize)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(_model_dir(model_name))
+        self._tokenizer_lock = threading.Lock()   # fast tokenizers aren't safe to share across threads
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with self._tokenizer_lock:
+            batch = self.tokenizer(
+                texts, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors="np"
+            )
+        feed = {name: batch[name].astype(np.int64) for name in self.input_names if name in batch}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+        hidden = self.session.run(None, feed)[0]
+
+        # mean pooling over real tokens, then L2 normalisation (as sentence-transformers does)
+        mask = batch["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # length-sorted batches keep padding (wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), BATCH_SIZE):
+            idx = order[start:start + BATCH_SIZE]
+            for i, vector in zip(idx, self._encode([texts[i] for i in idx])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
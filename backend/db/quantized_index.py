@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from db.vector_index import VectorIndex
+
+# Brute-force NumPy vector index ("numpy" backend of db/vector_index.py).
+# With dtype float32 the search is exact; with int8/float16 the quantized vectors are
+# searched first and the top candidates are rescored with full precision.
+#
+# Files in the index directory:
+#   meta.json      {"dtype": "float32" | "int8" | "float16", "dim": ...}
+#   codes.npy      vectors as stored in RAM (int8/float16 are 1/4 or 1/2 of float32)
+#   scales.npy     per-row int8 scale (max |x| / 127); ones otherwise
+#   norms.npy      squared norms of the dequantized rows (for approximate L2)
+#   note_ids.npy   note_id per row, so whole notes can be dropped
+#   ids.json       chunk ID per row, null for deleted rows
+#   vectors.f32    append-only float32 rows, memory-mapped and read only for rescoring
+#                  (quantized modes only)
+#
+# Distances are squared L2, like Chroma's default "l2" space, so scores are comparable
+# with vector_store.similarity_search_with_score().
+
+QUANTIZATION_MODES = ("int8", "float16")
+DTYPES = ("float32",) + QUANTIZATION_MODES
+SEARCH_BLOCK_ROWS = 4096      # rows dequantized at a time during the first pass
+COMPACT_DEAD_FRACTION = 0.25  # rewrite files once this share of rows is deleted
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (codes, per-row scales) for float32 vectors."""
+    if dtype == "float32":
+        return vectors.copy(), np.ones(len(vectors), dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedIndex(VectorIndex):
+    """Brute-force index over chunk vectors; quantized candidates are rescored in float32."""
+
+    def __init__(self, directory: str, dtype: str = "int8", rescore_factor: int = 4):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype}")
+        self.dir = directory
+        self.rescore_factor = rescore_factor
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, "meta.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        if meta and meta["dtype"] != dtype:
+            raise ValueError(f"{directory} holds a {meta['dtype']} index, not {dtype}")
+        self.dtype = dtype
+        self.exact = dtype == "float32"
+        self.dim: Optional[int] = meta.get("dim")
+
+        if self.dim:
+            self.codes = np.load(self._path("codes.npy"))
+            self.scales = np.load(self._path("scales.npy"))
+            self.norms = np.load(self._path("norms.npy"))
+            self.note_ids = np.load(self._path("note_ids.npy"))
+            with open(self._path("ids.json")) as f:
+                self.ids: List[Optional[str]] = json.load(f)
+        else:
+            self.codes = self.scales = self.norms = self.note_ids = None
+            self.ids = []
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids) if chunk_id is not None}
+        self._alive = np.array([chunk_id is not None for chunk_id in self.ids], dtype=bool)
+        self._full = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in RAM for the first pass (the float32 rows stay on disk)."""
+        if self.codes is None:
+            return 0
+        return self.codes.nbytes + self.scales.nbytes + self.norms.nbytes + self.note_ids.nbytes
+
+    def _full_vectors(self):
+        if self._full is None and self.dim:
+            self._full = np.memmap(
+                self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(len(self.ids), self.dim)
+            )
+        return self._full
+
+    # --- writes ---
+
+    def add(self, ids: List[str], vectors, note_ids: Iterable[int]):
+        """Append vectors (replacing rows whose chunk ID is already present)."""
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        note_ids = np.asarray(list(note_ids), dtype=np.int64)
+        with self._lock:
+            self.delete(ids)
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])  # meta.json is written by persist()
+
+            if not self.exact:
+                path = self._path("vectors.f32")
+                with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                    # drop rows appended by a write that never reached persist()
+                    f.seek(len(self.ids) * 4 * self.dim)
+                    f.truncate()
+                    f.write(vectors.tobytes())
+                self._full = None
+
+            codes, scales = quantize(vectors, self.dtype)
+            norms = ((codes.astype(np.float32) * scales[:, None]) ** 2).sum(axis=1)
+            start = len(self.ids)
+            if self.codes is None:
+                self.codes, self.scales, self.norms, self.note_ids = codes, scales, norms, note_ids
+            else:
+                self.codes = np.concatenate([self.codes, codes])
+                self.scales = np.concatenate([self.scales, scales])
+                self.norms = np.concatenate([self.norms, norms])
+                self.note_ids = np.concatenate([self.note_ids, note_ids])
+            self.ids.extend(ids)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self._rows.update((chunk_id, start + i) for i, chunk_id in enumerate(ids))
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is not None:
+                    self.ids[row] = None
+                    self._alive[row] = False
+
+    def delete_notes(self, note_ids: Iterable[int]):
+        """Drop every row belonging to the given notes."""
+        with self._lock:
+            if self.note_ids is None:
+                return
+            rows = np.nonzero(np.isin(self.note_ids, list(note_ids)) & self._alive)[0]
+            self.delete([self.ids[r] for r in rows])
+
+    def persist(self):
+        """Write the in-RAM arrays; compacts the files first when enough rows are deleted."""
+        with self._lock:
+            if self.codes is None:
+                return
+            dead = len(self.ids) - len(self._rows)
+            if dead and dead >= COMPACT_DEAD_FRACTION * len(self.ids):
+                self._compact()
+            for name, array in (("codes", self.codes), ("scales", self.scales),
+                                ("norms", self.norms), ("note_ids", self.note_ids)):
+                np.save(self._path(f"{name}.tmp.npy"), array)
+                os.replace(self._path(f"{name}.tmp.npy"), self._path(f"{name}.npy"))
+            with open(self._path("ids.tmp.json"), "w") as f:
+                json.dump(self.ids, f)
+            os.replace(self._path("ids.tmp.json"), self._path("ids.json"))
+            # Last: the constructor loads the arrays only once meta.json names a dim
+            with open(self._path("meta.tmp.json"), "w") as f:
+                json.dump({"dtype": self.dtype, "dim": self.dim}, f)
+            os.replace(self._path("meta.tmp.json"), self._path("meta.json"))
+
+    def compact(self):
+        with self._lock:
+            dropped = len(self.ids) - len(self._rows)
+            if dropped:
+                self._compact()
+            self.persist()
+            return dropped
+
+    def _compact(self):
+        live = np.array(sorted(self._rows.values()), dtype=np.int64)
+        if not self.exact:
+            full = self._full_vectors()
+            with open(self._path("vectors.tmp.f32"), "wb") as f:
+                for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(full[live[start:start + SEARCH_BLOCK_ROWS]]).tobytes())
+            self._full = None
+            os.replace(self._path("vectors.tmp.f32"), self._path("vectors.f32"))
+
+        self.codes, self.scales = self.codes[live], self.scales[live]
+        self.norms, self.note_ids = self.norms[live], self.note_ids[live]
+        self.ids = [self.ids[r] for r in live]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self._alive = np.ones(len(self.ids), dtype=bool)
+
+    # --- search ---
+
+    def search(self, query, k: int = 5, note_ids=None, rescore: bool = True) -> List[Tuple[str, float]]:
+        """(chunk_id, squared L2 distance) for the k nearest live rows (of `note_ids` only, if given), best first."""
+        with self._lock:
+            if not self._rows or k <= 0:
+                return []
+            query = np.asarray(query, dtype=np.float32)
+            rescore = rescore and not self.exact
+            n = len(self.ids)
+            eligible = self._alive
+            if note_ids is not None:
+                eligible = eligible & np.isin(self.note_ids, np.fromiter(note_ids, dtype=self.note_ids.dtype))
+            live = int(eligible.sum())
+            if live == 0:
+                return []
+            k = min(k, live)
+            candidates = min(live, k * self.rescore_factor if rescore else k)
+
+            # first pass: maximise q·v - |v|²/2 (same order as smallest |q - v|²)
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                block = self.codes[start:start + SEARCH_BLOCK_ROWS].astype(np.float32, copy=False)
+                scores[start:start + len(block)] = (
+                    (block @ query) * self.scales[start:start + len(block)]
+                    - 0.5 * self.norms[start:start + len(block)]
+                )
+            scores[~eligible] = -np.inf
+
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            if rescore:
+                rows = np.sort(top)
+                distances = ((self._full_vectors()[rows] - query) ** 2).sum(axis=1)
+            else:
+                rows = top
+                distances = float(query @ query) - 2.0 * scores[rows]
+            order = np.argsort(distances)[:k]
+            return [(self.ids[rows[i]], float(distances[i])) for i in order]
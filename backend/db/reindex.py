@@ -0,0 +1,227 @@
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from db import chroma_manager, model_registry, related_notes
+from db.database_manager import (
+    bump_index_generation,
+    count_notes,
+    get_reindex_checkpoint,
+    iter_notes,
+    save_chunk_manifests,
+    save_reindex_checkpoint,
+    update_indexing_status,
+)
+
+# Full rebuild of the vector index from notes.db (e.g. after changing the embedding
+# model or the splitter). Notes are streamed in id order and chunked on the calling
+# thread; batches of chunks are embedded on a worker pool, and written back in order.
+# A checkpoint (last note id written) is saved every few batches, so an interrupted
+# run resumes where it stopped. Chunk IDs are content-derived and written with
+# upsert, so batches repeated after a crash are harmless. Each note's pooled embedding
+# is stored as its batch is written; the related-notes graph is built once at the end.
+
+REINDEX_BATCH_CHUNKS = int(os.getenv("REINDEX_BATCH_CHUNKS", "256"))
+REINDEX_WORKERS = int(os.getenv("REINDEX_WORKERS", "4"))
+CHECKPOINT_EVERY = 8  # batches between checkpoints
+
+_run_lock = threading.Lock()
+_status: Dict[str, Any] = {"running": False}
+
+
+def current_settings() -> Dict[str, Any]:
+    """Everything that changes the vectors; a checkpoint only resumes under the same settings."""
+    return {
+        "model": chroma_manager.EMBEDDING_MODEL,
+        "backend": model_registry.EMBEDDING_BACKEND,
+        "chunk_size": chroma_manager.CHUNK_SIZE,
+        "chunk_overlap": chroma_manager.CHUNK_OVERLAP,
+        "chunk_storage": chroma_manager.CHUNK_STORAGE,
+    }
+
+
+def _batches(after_id: int, batch_chunks: int):
+    """Group streamed notes into batches of roughly `batch_chunks` chunks."""
+    batch = {"notes": [], "ids": [], "texts": [], "metadatas": []}
+    for note in iter_notes(after_id=after_id):
+        ids, chunks, metadatas = chroma_manager.split_note(note)
+        batch["notes"].append((note["id"], note.get("title"), ids, chroma_manager.note_metadata(note)))
+        batch["ids"].extend(ids)
+        batch["texts"].extend(chunks)
+        batch["metadatas"].extend(metadatas)
+        if len(batch["texts"]) >= batch_chunks:
+            yield batch
+            batch = {"notes": [], "ids": [], "texts": [], "metadatas": []}
+    if batch["notes"]:
+        yield batch
+
+
+def _reindex(
+    batch_chunks: int = REINDEX_BATCH_CHUNKS,
+    workers: int = REINDEX_WORKERS,
+    restart: bool = False,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    collection = chroma_manager.COLLECTION_NAME
+    settings = current_settings()
+    checkpoint = get_reindex_checkpoint(collection)
+    resume = (
+        not restart
+        and checkpoint is not None
+        and checkpoint["finished_at"] is None
+        and checkpoint["settings"] == settings
+    )
+
+    if resume:
+        last_note_id = checkpoint["last_note_id"]
+        notes_done, chunks_done = checkpoint["notes_done"], checkpoint["chunks_done"]
+        progress(f"Resuming re-index after note {last_note_id} ({notes_done} notes already done)")
+    else:
+        chroma_manager.reset_collection()
+        last_note_id, notes_done, chunks_done = 0, 0, 0
+        save_reindex_checkpoint(collection, settings, 0, 0, 0)
+
+    total = notes_done + count_notes(after_id=last_note_id)
+    vector_store = chroma_manager.get_vector_store()
+    side_index = chroma_manager.get_side_index()
+    embeddings = chroma_manager.get_embeddings()
+
+    started = last_report = time.perf_counter()
+    run_chunks = 0
+    _status.update(
+        running=True, error=None, total_notes=total, notes_done=notes_done,
+        chunks_done=chunks_done, chunks_per_sec=0.0, settings=settings,
+    )
+
+    def checkpoint_now(finished: bool = False):
+        vector_store.persist()
+        if side_index is not None:
+            side_index.persist()
+        save_reindex_checkpoint(collection, settings, last_note_id, notes_done, chunks_done, finished=finished)
+
+    def write(batch, future):
+        nonlocal last_note_id, notes_done, chunks_done, run_chunks, last_report
+        vectors = future.result() if batch["texts"] else []
+        by_id = dict(zip(batch["ids"], vectors))
+        pooled = {
+            nid: (related_notes.pool(by_id[i] for i in ids), len(ids))
+            for nid, _, ids, _ in batch["notes"] if ids
+        }
+        with chroma_manager.index_lock:
+            if batch["texts"]:
+                vector_store._collection.upsert(
+                    ids=batch["ids"], embeddings=vectors, metadatas=batch["metadatas"],
+                    documents=chroma_manager.chunk_documents(batch["texts"]),
+                )
+                if side_index is not None:
+                    side_index.add(batch["ids"], vectors, [m["note_id"] for m in batch["metadatas"]])
+            save_chunk_manifests({
+                nid: {"title": title, "chunk_ids": ids, "metadata": metadata}
+                for nid, title, ids, metadata in batch["notes"]
+            })
+            related_notes.save_pooled(chroma_manager.EMBEDDING_MODEL, pooled)
+        update_indexing_status([nid for nid, *_ in batch["notes"]], "completed")
+        bump_index_generation(collection)
+
+        last_note_id = batch["notes"][-1][0]
+        notes_done += len(batch["notes"])
+        chunks_done += len(batch["texts"])
+        run_chunks += len(batch["texts"])
+        now = time.perf_counter()
+        rate = run_chunks / max(now - started, 1e-9)
+        _status.update(notes_done=notes_done, chunks_done=chunks_done, chunks_per_sec=rate)
+        if now - last_report >= 1.0:
+            progress(f"  {notes_done}/{total} notes, {chunks_done} chunks, {rate:.1f} chunks/sec")
+            last_report = now
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reindex") as pool:
+        in_flight = deque()
+        written = 0
+        for batch in _batches(last_note_id, batch_chunks):
+            future = pool.submit(embeddings.embed_documents, batch["texts"]) if batch["texts"] else None
+            in_flight.append((batch, future))
+            # keep every worker busy, but bound the number of embedded batches held in memory
+            while len(in_flight) > workers:
+                write(*in_flight.popleft())
+                written += 1
+                if written % CHECKPOINT_EVERY == 0:
+                    checkpoint_now()
+        while in_flight:
+            write(*in_flight.popleft())
+    checkpoint_now(finished=True)
+    related = related_notes.rebuild_graph(chroma_manager.EMBEDDING_MODEL)
+    progress(f"  related-notes graph rebuilt for {related} notes")
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "notes": notes_done,
+        "chunks": chunks_done,
+        "seconds": round(elapsed, 2),
+        "chunks_per_sec": round(run_chunks / elapsed, 1) if elapsed else 0.0,
+        "resumed": resume,
+    }
+    _status.update(running=False, chunks_per_sec=stats["chunks_per_sec"])
+    progress(f"✅ Re-indexed {notes_done} notes ({chunks_done} chunks) in {elapsed:.1f}s, {stats['chunks_per_sec']} chunks/sec")
+    return stats
+
+
+def reindex_all(
+    batch_chunks: int = REINDEX_BATCH_CHUNKS,
+    workers: int = REINDEX_WORKERS,
+    restart: bool = False,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """Rebuild (or resume rebuilding) the vector index from every note. Returns run statistics."""
+    if not _run_lock.acquire(blocking=False):
+        raise RuntimeError("A re-index is already running")
+    try:
+        return _reindex(batch_chunks, workers, restart, progress)
+    except Exception as e:
+        _status.update(running=False, error=str(e))
+        raise
+    finally:
+        _run_lock.release()
+
+
+def start_reindex(**kwargs) -> bool:
+    """Run reindex_all() on a background thread; False if one is already running."""
+    if not _run_lock.acquire(blocking=False):
+        return False
+    _status.update(running=True, error=None)
+
+    def run():
+        try:
+            _reindex(**kwargs)
+        except Exception as e:
+            _status.update(running=False, error=str(e))
+            print(f"❌ Re-index failed: {e}")
+        finally:
+            _run_lock.release()
+
+    threading.Thread(target=run, name="reindex", daemon=True).start()
+    return True
+
+
+def get_reindex_status() -> Dict[str, Any]:
+    """Live progress of this process's run plus the persisted checkpoint."""
+    return {**_status, "checkpoint": get_reindex_checkpoint(chroma_manager.COLLECTION_NAME)}
+
+
+# Run from ./backend:  python -m db.reindex [--restart] [--workers N] [--batch-chunks N]
+if __name__ == "__main__":
+    from db.database_manager import init_db
+    from db.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description="Rebuild the Chroma index from notes.db (resumable).")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+    parser.add_argument("--workers", type=int, default=REINDEX_WORKERS)
+    parser.add_argument("--batch-chunks", type=int, default=REINDEX_BATCH_CHUNKS)
+    args = parser.parse_args()
+
+    init_db()
+    run_migrations()
+    reindex_all(batch_chunks=args.batch_chunks, workers=args.workers, restart=args.restart)
@@ -0,0 +1,137 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from db.database_manager import (
+    delete_note_embeddings,
+    get_neighbor_thresholds,
+    get_note_embeddings,
+    get_notes_linking_to,
+    save_note_embeddings,
+    save_note_neighbors,
+)
+
+# Related notes. Every indexed note gets a pooled document embedding (the mean of its
+# unit-normalised chunk vectors, normalised again) in note_embeddings, and its
+# RELATED_NOTES_K most similar notes by cosine similarity are kept in note_neighbors.
+# /notes/{id}/related is then one primary-key range read.
+#
+# The neighbor lists are exact and maintained incrementally. When notes are indexed or
+# removed, only these lists are recomputed, each by brute force against every pooled
+# vector:
+#   - the changed notes' own lists,
+#   - lists naming a changed or removed note (its score moved, or it is gone),
+#   - lists a changed note now gets into: the list is short, or the note scores above
+#     its current last entry.
+# Nothing in any other list has moved, and nothing outside it can beat its last entry.
+
+RELATED_NOTES_K = int(os.getenv("RELATED_NOTES_K", "10"))
+BLOCK_ROWS = 256  # rows of the similarity matrix computed at once
+
+_graph_lock = threading.Lock()
+
+
+def _normalise(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def pool(vectors: Iterable) -> Optional[np.ndarray]:
+    """Pooled note vector from its chunk vectors (None for a note without chunks)."""
+    rows = [_normalise(v) for v in vectors]
+    return _normalise(np.mean(rows, axis=0)) if rows else None
+
+
+def save_pooled(model: str, pooled: Dict[int, Tuple[np.ndarray, int]]):
+    """Store {note_id: (pooled vector, chunk count)}; vectors are normalised on the way in."""
+    save_note_embeddings(model, {
+        note_id: (_normalise(vector).tobytes(), count) for note_id, (vector, count) in pooled.items()
+    })
+
+
+def _load_matrix(model: str):
+    """(note ids, unit-norm float32 matrix) of every pooled vector computed with `model`."""
+    stored = get_note_embeddings(model)
+    ids = np.fromiter(stored, dtype=np.int64, count=len(stored))
+    if not stored:
+        return ids, np.empty((0, 0), dtype=np.float32)
+    matrix = np.frombuffer(b"".join(stored.values()), dtype=np.float32).reshape(len(stored), -1)
+    return ids, matrix
+
+
+def _neighbor_lists(ids: np.ndarray, matrix: np.ndarray, rows: List[int], k: int) -> Dict[int, list]:
+    """Exact top-k (neighbor_id, score) per row, most similar first."""
+    k = min(k, len(ids) - 1)
+    lists = {}
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = np.asarray(rows[start:start + BLOCK_ROWS], dtype=np.int64)
+        scores = matrix[block] @ matrix.T
+        scores[np.arange(len(block)), block] = -np.inf  # a note is not its own neighbor
+        if k <= 0:
+            lists.update((int(ids[row]), []) for row in block)
+            continue
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for i, row in enumerate(block):
+            candidates = top[i][np.argsort(-scores[i, top[i]])]
+            lists[int(ids[row])] = [(int(ids[c]), float(scores[i, c])) for c in candidates]
+    return lists
+
+
+def _refresh(model: str, changed: List[int], removed: List[int], k: int):
+    """Recompute the neighbor lists affected by `changed` (new vectors) and `removed` notes."""
+    ids, matrix = _load_matrix(model)
+    if not len(ids):
+        return
+    position = {int(note_id): row for row, note_id in enumerate(ids)}
+    changed_rows = [position[n] for n in changed if n in position]
+
+    rows = set(changed_rows)
+    rows.update(position[n] for n in get_notes_linking_to(changed + removed) if n in position)
+    if changed_rows:
+        # Score each note must beat to enter a list: its last entry, or -inf while the list is short
+        full = min(k, len(ids) - 1)
+        floor = np.full(len(ids), -np.inf, dtype=np.float32)
+        for note_id, (count, lowest) in get_neighbor_thresholds().items():
+            if note_id in position and count >= full:
+                floor[position[note_id]] = lowest
+        for start in range(0, len(changed_rows), BLOCK_ROWS):
+            scores = matrix[changed_rows[start:start + BLOCK_ROWS]] @ matrix.T
+            rows.update(np.flatnonzero((scores > floor).any(axis=0)).tolist())
+
+    save_note_neighbors(_neighbor_lists(ids, matrix, sorted(rows), k))
+
+
+def update_notes(model: str, chunk_vectors: Dict[int, list], k: int = RELATED_NOTES_K):
+    """
+    Re-pool the given notes ({note_id: [chunk vector, ...]}) and update every neighbor
+    list that depends on them. Notes without chunks are dropped from the graph.
+    """
+    pooled = {note_id: pool(vectors) for note_id, vectors in chunk_vectors.items()}
+    empty = [note_id for note_id, vector in pooled.items() if vector is None]
+    with _graph_lock:
+        if empty:
+            delete_note_embeddings(empty)
+        save_pooled(model, {
+            note_id: (vector, len(chunk_vectors[note_id])) for note_id, vector in pooled.items() if vector is not None
+        })
+        _refresh(model, [n for n in pooled if n not in empty], empty, k)
+
+
+def remove_notes(model: str, note_ids: List[int], k: int = RELATED_NOTES_K):
+    """Drop notes from the graph and refill the lists that named them."""
+    if not note_ids:
+        return
+    with _graph_lock:
+        delete_note_embeddings(list(note_ids))
+        _refresh(model, [], list(note_ids), k)
+
+
+def rebuild_graph(model: str, k: int = RELATED_NOTES_K) -> int:
+    """Recompute every neighbor list from the stored pooled vectors; returns the number of notes."""
+    with _graph_lock:
+        ids, matrix = _load_matrix(model)
+        save_note_neighbors(_neighbor_lists(ids, matrix, list(range(len(ids))), k))
+    return len(ids)
@@ -0,0 +1,63 @@
+import difflib
+import json
+import zlib
+from typing import Any, Dict, List
+
+# Fields of a note that are versioned in note_revisions
+REVISION_FIELDS = ("title", "content", "rewritten_notes")
+
+
+def _diff_lines(old: str, new: str) -> List[list]:
+    """
+    Line-level delta turning `old` into `new`:
+      [0, i1, i2]  copy old lines i1..i2
+      [1, "text"]  insert text
+    """
+    old_lines = (old or "").splitlines(keepends=True)
+    new_lines = (new or "").splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([0, i1, i2])
+        elif j2 > j1:  # replace / insert
+            ops.append([1, "".join(new_lines[j1:j2])])
+    return ops
+
+
+def _patch_lines(old: str, ops: List[list]) -> str:
+    old_lines = (old or "").splitlines(keepends=True)
+    out = []
+    for op in ops:
+        if op[0] == 0:
+            out.extend(old_lines[op[1]:op[2]])
+        else:
+            out.append(op[1])
+    return "".join(out)
+
+
+def encode_snapshot(doc: Dict[str, Any]) -> bytes:
+    """Compressed full copy of the versioned fields."""
+    return zlib.compress(json.dumps({f: doc.get(f) for f in REVISION_FIELDS}).encode(), 9)
+
+
+def encode_delta(old: Dict[str, Any], new: Dict[str, Any]) -> bytes:
+    """Compressed per-field delta from `old` to `new`; unchanged fields are omitted."""
+    delta = {}
+    for field in REVISION_FIELDS:
+        if old.get(field) == new.get(field):
+            continue
+        delta[field] = None if new.get(field) is None else _diff_lines(old.get(field), new.get(field))
+    return zlib.compress(json.dumps(delta).encode(), 9)
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+def apply_delta(doc: Dict[str, Any], data: bytes) -> Dict[str, Any]:
+    """Apply an encode_delta() payload to the previous revision's fields."""
+    doc = dict(doc)
+    for field, ops in json.loads(zlib.decompress(data)).items():
+        doc[field] = None if ops is None else _patch_lines(doc.get(field), ops)
+    return doc
@@ -0,0 +1,63 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# In-process caches for the search path:
+#   query_embeddings  query text -> vector (skips the model and the on-disk embedding cache)
+#   search_results    (store, collection generation, query, k, ...) -> results
+# Result keys include the collection's generation counter, which every index write
+# bumps, so a cached result can never outlive the vectors it was computed from.
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+SEARCH_RESULT_CACHE_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "512"))
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        # compute() runs outside the lock; two threads missing together both compute
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_MISSING = object()
+
+query_embeddings = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+search_results = LRUCache(SEARCH_RESULT_CACHE_SIZE)
@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Interchangeable vector search engines behind one small interface.
+#
+#   chroma  the Chroma collection itself (HNSW inside chromadb); the default
+#   numpy   exact brute force over an in-RAM matrix (db/quantized_index.py), float32
+#           or int8/float16 with float32 rescoring; sub-millisecond on small corpora
+#   hnsw    in-process hnswlib graph (ships with chromadb), for large corpora
+#
+# Chroma always stays the store of chunk documents and metadata; the numpy and hnsw
+# engines only map chunk IDs to vectors. Distances are squared L2 everywhere, so
+# scores don't depend on the engine.
+
+VECTOR_INDEX_BACKENDS = ("chroma", "numpy", "hnsw")
+
+# Filtered HNSW searches over at most this many chunks are answered by brute force
+FILTER_BRUTE_FORCE_MAX = 2048
+
+
+class VectorIndex(ABC):
+    """Chunk-ID -> vector index answering k-nearest-neighbour queries."""
+
+    @abstractmethod
+    def add(self, ids: List[str], vectors, note_ids: Iterable[int]):
+        """Insert (or replace) vectors; `note_ids` allows dropping whole notes later."""
+
+    @abstractmethod
+    def delete(self, ids: Iterable[str]):
+        ...
+
+    @abstractmethod
+    def delete_notes(self, note_ids: Iterable[int]):
+        ...
+
+    @abstractmethod
+    def search(self, query, k: int = 5, note_ids: Optional[Iterable[int]] = None) -> List[Tuple[str, float]]:
+        """(chunk_id, squared L2 distance) of the k nearest vectors (of `note_ids` only, if given), best first."""
+
+    def persist(self):
+        pass
+
+    def compact(self) -> int:
+        """Reclaim the space of deleted vectors and persist; returns how many were dropped."""
+        return 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class ChromaVectorIndex(VectorIndex):
+    """The Chroma collection used directly as the vector index."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def add(self, ids, vectors, note_ids):
+        """
+        Chunks already in the collection only get their vector replaced, keeping the
+        title/tag/source/offset metadata chroma_manager stored with them; new chunks
+        are inserted with just their note_id.
+        """
+        ids, note_ids = list(ids), list(note_ids)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # chromadb caps the number of records per call
+        for start in range(0, len(ids), 1000):
+            end = start + 1000
+            existing = set(self.collection.get(ids=ids[start:end], include=[])["ids"])
+            known = [i for i in range(start, min(end, len(ids))) if ids[i] in existing]
+            new = [i for i in range(start, min(end, len(ids))) if ids[i] not in existing]
+            if known:
+                self.collection.update(
+                    ids=[ids[i] for i in known], embeddings=vectors[known].tolist()
+                )
+            if new:
+                self.collection.upsert(
+                    ids=[ids[i] for i in new],
+                    embeddings=vectors[new].tolist(),
+                    metadatas=[{"note_id": int(note_ids[i])} for i in new],
+                )
+
+    def delete(self, ids):
+        ids = list(ids)
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def delete_notes(self, note_ids):
+        note_ids = [int(n) for n in note_ids]
+        if note_ids:
+            self.collection.delete(where={"note_id": {"$in": note_ids}})
+
+    def search(self, query, k=5, note_ids=None):
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        where = None
+        if note_ids is not None:
+            note_ids = [int(n) for n in note_ids]
+            if not note_ids:
+                return []
+            where = {"note_id": {"$in": note_ids}}
+        result = self.collection.query(
+            query_embeddings=[np.asarray(query, dtype=np.float32).tolist()], n_results=k,
+            where=where, include=["distances"],
+        )
+        return list(zip(result["ids"][0], result["distances"][0]))
+
+    def __len__(self):
+        return self.collection.count()
+
+
+class HnswVectorIndex(VectorIndex):
+    """hnswlib HNSW graph persisted next to a chunk-ID <-> label map."""
+
+    def __init__(self, directory: str, m: int = 16, ef_construction: int = 200, ef: int = 64):
+        import hnswlib
+
+        self._hnswlib = hnswlib
+        self.dir = directory
+        self.m, self.ef_construction, self.ef = m, ef_construction, ef
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = None
+        self.dim = None
+        self.labels: Dict[str, int] = {}     # chunk_id -> hnsw label
+        self.note_ids: Dict[int, int] = {}   # label -> note_id
+        self.next_label = 0
+
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.dim, self.next_label = meta["dim"], meta["next_label"]
+            self.labels = meta["labels"]
+            self.note_ids = {int(label): note_id for label, note_id in meta["note_ids"].items()}
+            self.index = hnswlib.Index(space="l2", dim=self.dim)
+            self.index.load_index(self._path("index.bin"), allow_replace_deleted=True)
+            self.index.set_ef(ef)
+        self._ids = {label: chunk_id for chunk_id, label in self.labels.items()}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _ensure_capacity(self, extra: int):
+        if self.index is None:
+            self.index = self._hnswlib.Index(space="l2", dim=self.dim)
+            self.index.init_index(
+                max_elements=max(1024, extra * 2), ef_construction=self.ef_construction,
+                M=self.m, allow_replace_deleted=True,
+            )
+            self.index.set_ef(self.ef)
+        elif self.index.get_current_count() + extra > self.index.get_max_elements():
+            self.index.resize_index(max(self.index.get_max_elements() * 2, self.index.get_current_count() + extra))
+
+    def add(self, ids, vectors, note_ids):
+        ids = list(ids)
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self.delete(ids)
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            self._ensure_capacity(len(ids))
+            labels = np.arange(self.next_label, self.next_label + len(ids))
+            self.next_label += len(ids)
+            self.index.add_items(vectors, labels, replace_deleted=True)
+            for chunk_id, label, note_id in zip(ids, labels.tolist(), note_ids):
+                self.labels[chunk_id] = label
+                self._ids[label] = chunk_id
+                self.note_ids[label] = int(note_id)
+
+    def delete(self, ids):
+        with self._lock:
+            for chunk_id in ids:
+                label = self.labels.pop(chunk_id, None)
+                if label is not None:
+                    self.index.mark_deleted(label)
+                    del self._ids[label]
+                    self.note_ids.pop(label, None)
+
+    def delete_notes(self, note_ids):
+        wanted = {int(n) for n in note_ids}
+        with self._lock:
+            self.delete([self._ids[label] for label, n in list(self.note_ids.items()) if n in wanted])
+
+    def search(self, query, k=5, note_ids=None):
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            if note_ids is None:
+                k = min(k, len(self))
+                if k <= 0:
+                    return []
+                self.index.set_ef(max(self.ef, k))
+                labels, distances = self.index.knn_query(query, k=k)
+                return [(self._ids[int(l)], float(d)) for l, d in zip(labels[0], distances[0])]
+
+            wanted = {int(n) for n in note_ids}
+            allowed = [label for label, n in self.note_ids.items() if n in wanted]
+            k = min(k, len(allowed))
+            if k <= 0:
+                return []
+            if len(allowed) > FILTER_BRUTE_FORCE_MAX:
+                allowed_set = set(allowed)
+                self.index.set_ef(max(self.ef, k))
+                try:
+                    labels, distances = self.index.knn_query(query, k=k, filter=lambda label: label in allowed_set)
+                    return [(self._ids[int(l)], float(d)) for l, d in zip(labels[0], distances[0])]
+                except RuntimeError:
+                    pass  # the filtered graph walk found fewer than k; fall back to exact
+            # few candidates: exact distances beat a filtered graph walk
+            vectors = np.asarray(self.index.get_items(allowed), dtype=np.float32)
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(distances)[:k]
+            return [(self._ids[allowed[i]], float(distances[i])) for i in order]
+
+    def compact(self):
+        # hnswlib only reuses the slots of deleted elements, so rebuild from the live ones
+        with self._lock:
+            if self.index is None:
+                return 0
+            dropped = self.index.get_current_count() - len(self.labels)
+            if dropped:
+                ids = list(self.labels)
+                vectors = np.asarray(self.index.get_items([self.labels[i] for i in ids]), dtype=np.float32)
+                note_ids = [self.note_ids[self.labels[i]] for i in ids]
+                self.index, self.labels, self.note_ids, self._ids, self.next_label = None, {}, {}, {}, 0
+                self.add(ids, vectors, note_ids)
+            self.persist()
+            return dropped
+
+    def persist(self):
+        with self._lock:
+            if self.index is None:
+                return
+            self.index.save_index(self._path("index.tmp.bin"))
+            os.replace(self._path("index.tmp.bin"), self._path("index.bin"))
+            with open(self._path("meta.tmp.json"), "w") as f:
+                json.dump({
+                    "dim": self.dim,
+                    "next_label": self.next_label,
+                    "labels": self.labels,
+                    "note_ids": self.note_ids,
+                }, f)
+            os.replace(self._path("meta.tmp.json"), self._path("meta.json"))
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from db import chroma_manager, related_notes
+from db.database_manager import (
+    bump_index_generation,
+    clear_vector_outbox,
+    count_vector_outbox,
+    delete_chunk_manifests,
+    get_chunk_manifests,
+    get_existing_note_ids,
+    get_notes_by_ids,
+    get_vector_outbox,
+)
+
+# Keeps the vector index consistent with notes.db.
+#
+# Outbox: triggers on the notes table queue a row in vector_outbox whenever a note is
+# deleted or its title/content changes (in the same transaction as the change).
+# sync_outbox() applies the queued changes: notes that still exist are re-indexed
+# incrementally, deleted ones lose their chunks and manifest. Entries are cleared only
+# after they have been applied, so a crash just replays them.
+#
+# Sweeper: sweep_orphans() scans the whole collection for chunks the outbox can't know
+# about (notes deleted before the outbox existed, crashes between the Chroma write and
+# the manifest write), deletes them and compacts the side index.
+#
+# start_background_sync() runs both on a daemon thread.
+
+VECTOR_SYNC_INTERVAL = float(os.getenv("VECTOR_SYNC_INTERVAL", "5"))      # seconds; 0 disables
+VECTOR_SWEEP_INTERVAL = float(os.getenv("VECTOR_SWEEP_INTERVAL", "3600"))  # seconds; 0 disables
+OUTBOX_BATCH = 500
+SWEEP_PAGE_SIZE = 1000
+
+_sync_lock = threading.Lock()
+_last_sweep: Optional[Dict[str, Any]] = None
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def sync_outbox(limit: int = OUTBOX_BATCH) -> Dict[str, int]:
+    """Apply pending note changes to the vector index until the outbox is empty."""
+    stats = {"reindexed": 0, "deleted": 0}
+    with _sync_lock:
+        while True:
+            entries = get_vector_outbox(limit)
+            if not entries:
+                return stats
+            # Several changes to a note collapse into one: whatever the note looks like now
+            note_ids = list(dict.fromkeys(e["note_id"] for e in entries))
+            notes = get_notes_by_ids(note_ids)
+            gone = [i for i in note_ids if i not in {n["id"] for n in notes}]
+
+            chroma_manager.index_notes_in_chroma(notes)
+            chroma_manager.delete_notes_from_chroma(gone)
+            clear_vector_outbox(entries[-1]["id"])
+            stats["reindexed"] += len(notes)
+            stats["deleted"] += len(gone)
+
+
+def _scan_collection():
+    """Yield (chunk_id, note_id) for every chunk stored in the collection."""
+    collection = chroma_manager.get_vector_store()._collection
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=SWEEP_PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            return
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            yield chunk_id, (metadata or {}).get("note_id")
+        offset += len(page["ids"])
+
+
+def sweep_orphans() -> Dict[str, Any]:
+    """
+    Delete chunks whose note no longer exists, or which their note's manifest doesn't
+    list, then compact the side index. Returns counts, including `reclaimed` vectors.
+    """
+    global _last_sweep
+    started = time.perf_counter()
+    with chroma_manager.index_lock:
+        by_note: Dict[Any, list] = {}
+        for chunk_id, note_id in _scan_collection():
+            by_note.setdefault(note_id, []).append(chunk_id)
+        scanned = sum(len(ids) for ids in by_note.values())
+
+        known = [n for n in by_note if isinstance(n, int)]
+        existing = get_existing_note_ids(known)
+        manifests = get_chunk_manifests(list(existing))
+        orphan_notes = [n for n in by_note if n not in existing]
+        orphan_ids = [i for n in orphan_notes for i in by_note[n]]
+        for note_id in existing:
+            manifest = manifests.get(note_id)
+            if manifest is not None:  # notes indexed before manifests existed are left alone
+                listed = set(manifest["chunk_ids"])
+                orphan_ids.extend(i for i in by_note[note_id] if i not in listed)
+
+        vector_store = chroma_manager.get_vector_store()
+        side_index = chroma_manager.get_side_index()
+        for start in range(0, len(orphan_ids), SWEEP_PAGE_SIZE):
+            vector_store.delete(ids=orphan_ids[start:start + SWEEP_PAGE_SIZE])
+        vector_store.persist()
+        compacted = 0
+        if side_index is not None:
+            side_index.delete(orphan_ids)
+            compacted = side_index.compact()
+        delete_chunk_manifests([n for n in orphan_notes if isinstance(n, int)])
+        related_notes.remove_notes(chroma_manager.EMBEDDING_MODEL, [n for n in orphan_notes if isinstance(n, int)])
+        if orphan_ids:
+            bump_index_generation(chroma_manager.COLLECTION_NAME)
+
+    _last_sweep = {
+        "scanned": scanned,
+        "reclaimed": len(orphan_ids),
+        "orphaned_notes": len(orphan_notes),
+        "side_index_compacted": compacted,
+        "seconds": round(time.perf_counter() - started, 2),
+        "finished_at": time.time(),
+    }
+    print(f"🧹 Vector sweep: {len(orphan_ids)} orphaned vectors reclaimed out of {scanned}.")
+    return _last_sweep
+
+
+def get_sync_status() -> Dict[str, Any]:
+    return {
+        "pending": count_vector_outbox(),
+        "last_sweep": _last_sweep,
+        "background": _worker is not None and _worker.is_alive(),
+    }
+
+
+def start_background_sync(
+    sync_interval: float = VECTOR_SYNC_INTERVAL,
+    sweep_interval: float = VECTOR_SWEEP_INTERVAL,
+):
+    """Drain the outbox every `sync_interval` seconds and sweep every `sweep_interval` seconds."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    if sync_interval <= 0 and sweep_interval <= 0:
+        return
+
+    def run():
+        next_sweep = time.monotonic() + sweep_interval
+        tick = min(i for i in (sync_interval, sweep_interval) if i > 0)
+        while not _stop.wait(tick):
+            try:
+                if sync_interval > 0:
+                    sync_outbox()
+                if sweep_interval > 0 and time.monotonic() >= next_sweep:
+                    sweep_orphans()
+                    next_sweep = time.monotonic() + sweep_interval
+            except Exception as e:
+                print(f"❌ Vector sync failed: {e}")
+
+    _stop.clear()
+    _worker = threading.Thread(target=run, name="vector-sync", daemon=True)
+    _worker.start()
+
+
+def stop_background_sync():
+    _stop.set()
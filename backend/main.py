@@ -1,13 +1,17 @@
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from db.database_manager import init_db
+from db.migrations import run_migrations
+from db.vector_sync import start_background_sync, stop_background_sync
 from api.routes_notes import router as notes_router
 from api.routes_pipeline import router as pipeline_router
 from api.routes_style_profiles import router as routes_style_profiles
 from api.routes_chat import router as chat_router
+from api.routes_admin import router as admin_router
 
-from db.chroma_manager import search_notes_with_scores
-from db.database_manager import get_note_by_id
+from db.chroma_manager import hybrid_search, search_notes_grouped
+from db.database_manager import get_notes_by_ids, parse_search_query
 
 app = FastAPI(title="Notes Intelligence API", version="1.0")
 
@@ -24,35 +28,83 @@ app.add_middleware(
 @app.on_event("startup")
 def startup_event():
     init_db()
-    print("✅ Database initialized and ready.")
+    version = run_migrations()
+    print(f"✅ Database initialized and ready (schema version {version}).")
+    start_background_sync()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    stop_background_sync()
 
 # --- Register routes ---
 app.include_router(notes_router, prefix="/notes", tags=["Notes"])
 app.include_router(routes_style_profiles, prefix="/style_profiles", tags=["Style Profiles"])
 app.include_router(pipeline_router, prefix="/pipeline", tags=["Pipeline"])
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 @app.get("/")
 def root():
     return {"message": "Welcome to Notes Intelligence Backend!"}
 
+def _parse_query(query: str):
+    """Free text and filters of a query like `tag:ml after:2026-01-01 precision recall`."""
+    try:
+        return parse_search_query(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/search")
-def search_notes(query: str, k: int = 5):
-    results = search_notes_with_scores(query, k=k)
+def search_notes(query: str, k: int = 5, mode: str = "vector"):
+    """
+    Search notes. `mode=vector` (default) scores by chunk distance (lower = better);
+    `mode=hybrid` fuses BM25 and vector ranks, scored by RRF (higher = better).
+    The query may carry filters, applied inside both retrievers:
+    tag:ml concept:rnn source:pdf (url, pdf or text) after:2026-01-01 before:2026-02-01.
+    """
+    if mode not in ("hybrid", "vector"):
+        raise HTTPException(status_code=400, detail="mode must be 'hybrid' or 'vector'")
+    text, filters = _parse_query(query)
 
-    seen = set()
-    notes = []
+    if mode == "hybrid":
+        # BM25 + vector ranks fused with RRF: higher score = better match
+        hits = hybrid_search(text, k=k, filters=filters)
+        scores = {hit["note_id"]: hit["score"] for hit in hits}
+        notes = get_notes_by_ids(list(scores))
+        for note in notes:
+            note["score"] = scores[note["id"]]
+        return {"results": sorted(notes, key=lambda x: -x["score"])}
 
-    for doc, score in results:
-        nid = doc.metadata["note_id"]
-        if nid not in seen:
-            note = get_note_by_id(nid)
-            if note:
-                note["score"] = score   # attach similarity score
-                notes.append(note)
-            seen.add(nid)
+    # k distinct notes ranked by their best chunk; score = that chunk's distance (lower = better)
+    hits, _ = search_notes_grouped(text, k=k, filters=filters)
+    scores = {hit["note_id"]: hit["distance"] for hit in hits}
+    notes = get_notes_by_ids(list(scores))
+    for note in notes:
+        note["score"] = scores[note["id"]]   # attach similarity score
 
     # sort by similarity: lower score = better match
     notes = sorted(notes, key=lambda x: x["score"])
 
-    return {"results": notes}
\ No newline at end of file
+    return {"results": notes}
+
+@app.get("/search/notes")
+def search_notes_paged(query: str, k: int = 5, scoring: str = "max", cursor: Optional[str] = None):
+    """
+    Note-level vector search: k distinct notes per page, ranked by the max (or sum) of
+    their chunks' similarities (higher = better). Pass `next_cursor` back as `cursor`
+    for the next page. Accepts the same filters as /search.
+    """
+    text, filters = _parse_query(query)
+    try:
+        hits, next_cursor = search_notes_grouped(text, k=k, scoring=scoring, cursor=cursor, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    notes = {note["id"]: note for note in get_notes_by_ids([hit["note_id"] for hit in hits])}
+    results = []
+    for hit in hits:
+        note = notes.get(hit["note_id"])
+        if note:
+            note.update(score=hit["score"], matched_chunks=hit["chunks"], best_chunk=hit["best_chunk"])
+            results.append(note)
+    return {"results": results, "next_cursor": next_cursor}
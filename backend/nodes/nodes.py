@@ -6,6 +6,7 @@ from agents.TagGenerator import TagGenerator
 from agents.WebResourceFinderAgent import WebResourceFinderAgent
 from agents.StyleRewriterAgent import StyleRewriterAgent
 from state_schema import PipelineState
+from db.database_manager import get_style_profile
 
 
 def ingestion_node(state: PipelineState) -> PipelineState:
@@ -97,12 +98,17 @@ def style_rewriter_node(state: PipelineState) -> PipelineState:
     print("---STYLE REWRITER NODE---")
     agent = StyleRewriterAgent(api_key=state.get("api_key"))
 
+    # Load only the requested profile when the caller didn't send one inline
+    profile = state.get("style_profile")
+    if profile is None and state.get("profile_id"):
+        profile = get_style_profile(state["profile_id"])
+
     concatenated_notes = "\n\n".join([doc.page_content for doc in state["clean_documents"]])
     result = agent.run(
         concatenated_notes,
         profile_path=state.get("profile_path"),
         profile_id=state.get("profile_id"),
-        profile= state.get("style_profile")
+        profile=profile
     )
 
     new_state = {
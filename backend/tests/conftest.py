@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other as `db.*`, `api.*` (run from ./backend)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.codec import NO_DICTIONARY  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """Point database_manager at a fresh, fully migrated notes.db in a temp dir."""
+    import db.database_manager as dbm
+    from db.migrations import run_migrations
+
+    original = dbm.DB_PATH
+    dbm.DB_PATH = str(tmp_path / "notes.db")
+    dbm.init_db()
+    run_migrations()
+    yield dbm
+    dbm.get_pool().close()
+    dbm.DB_PATH = original
+    # Dictionaries belong to the temp database; don't let them leak into the next test
+    dbm.codec.dictionaries.clear()
+    dbm.codec.active_dictionary = NO_DICTIONARY
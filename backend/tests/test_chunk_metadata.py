@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip("langchain_community")  # db.chroma_manager
+from db import chroma_manager  # noqa: E402
+
+
+def test_note_metadata_skips_unparseable_created_at():
+    note = {"id": 1, "title": "t", "input_source": "text", "tags": ["ML"], "created_at": "last Tuesday"}
+    metadata = chroma_manager.note_metadata(note)
+    assert "created_ts" not in metadata
+    assert metadata["tag:ml"] is True
+
+    note["created_at"] = "2026-01-01 00:00:00"
+    assert chroma_manager.note_metadata(note)["created_ts"] == 1767225600
@@ -0,0 +1,35 @@
+import pytest
+
+
+def _count(dbm, sql):
+    with dbm.get_connection() as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def test_compress_existing_notes_resumes_without_retraining(temp_db):
+    dbm = temp_db
+    for i in range(20):
+        dbm.add_note(f"note {i}", "text", f"shared boilerplate paragraph about retrieval {i}\n" * 20)
+
+    assert dbm.compress_existing_notes(batch_size=7) == 20
+    assert _count(dbm, "SELECT COUNT(*) FROM codec_dictionaries") == 1
+
+    # A second run reuses the dictionary and finds nothing left to rewrite
+    assert dbm.compress_existing_notes(batch_size=7) == 0
+    assert _count(dbm, "SELECT COUNT(*) FROM codec_dictionaries") == 1
+    assert dbm.get_note_by_id(3)["content"].startswith("shared boilerplate paragraph about retrieval 2")
+
+    assert dbm.compress_existing_notes(retrain=True) == 20
+    assert _count(dbm, "SELECT COUNT(*) FROM codec_dictionaries") == 2
+
+
+def test_dictionary_id_limit_is_checked_before_inserting(temp_db):
+    dbm = temp_db
+    dbm.add_note("note", "text", "some repeated words to learn from " * 30)
+    dbm.add_note("note", "text", "some repeated words to learn from " * 30)
+    with dbm.get_connection() as conn:
+        conn.execute("INSERT INTO codec_dictionaries (id, data) VALUES (255, x'00')")
+
+    with pytest.raises(ValueError):
+        dbm.train_compression_dictionary()
+    assert _count(dbm, "SELECT MAX(id) FROM codec_dictionaries") == 255
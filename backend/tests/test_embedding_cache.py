@@ -0,0 +1,40 @@
+import numpy as np
+
+from db.embedding_cache import EmbeddingCache
+
+
+def _vector(value):
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = EmbeddingCache("model", directory=str(tmp_path), capacity=2)
+    cache.put_many(["a"], [_vector(1)])
+    cache.put_many(["b"], [_vector(2)])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [_vector(3)])
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert b is None
+    np.testing.assert_array_equal(a, _vector(1))
+    np.testing.assert_array_equal(c, _vector(3))
+
+
+def test_reader_never_gets_a_vector_written_into_an_evicted_slot(tmp_path):
+    writer = EmbeddingCache("model", directory=str(tmp_path), capacity=2)
+    writer.put_many(["a"], [_vector(1)])
+    writer.put_many(["b"], [_vector(2)])
+    reader = EmbeddingCache("model", directory=str(tmp_path), capacity=2)  # e.g. another process
+
+    class EvictMidRead:
+        # The reader has looked up a's slot; the writer evicts a and reuses that slot for c
+        def __init__(self, vectors):
+            self.vectors = vectors
+
+        def __getitem__(self, slot):
+            writer.put_many(["c"], [_vector(3)])
+            return self.vectors[slot]
+
+    reader._vectors = EvictMidRead(reader._vectors)
+    assert reader.get_many(["a"]) == [None]
+    np.testing.assert_array_equal(writer.get_many(["c"])[0], _vector(3))
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+pytest.importorskip("langchain_community")  # db.chroma_manager
+from langchain_core.documents import Document  # noqa: E402
+
+from db import chroma_manager  # noqa: E402
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    """300 ranked chunks of 40 notes, served by a fake nearest-neighbour search."""
+    rnd = random.Random(0)
+    distances = sorted(rnd.uniform(0.2, 1.8) for _ in range(300))
+    ranked = [(Document(page_content=f"chunk {i}", metadata={"note_id": rnd.randrange(40)}), d)
+              for i, d in enumerate(distances)]
+    monkeypatch.setattr(chroma_manager, "_collection_size", lambda: len(ranked))
+    monkeypatch.setattr(chroma_manager, "search_notes_with_scores", lambda query, k, filters=None: ranked[:k])
+    return ranked
+
+
+@pytest.mark.parametrize("scoring", ["max", "sum"])
+def test_pages_list_every_note_once(chunks, scoring):
+    seen, cursor = [], None
+    while True:
+        page, cursor = chroma_manager.search_notes_grouped("q", k=3, scoring=scoring, cursor=cursor)
+        seen.extend(hit["note_id"] for hit in page)
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted({doc.metadata["note_id"] for doc, _ in chunks})
+    first_page, _ = chroma_manager.search_notes_grouped("q", k=len(seen), scoring=scoring)
+    assert [hit["note_id"] for hit in first_page] == seen
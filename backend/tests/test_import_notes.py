@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient
+pytest.importorskip("langchain_community")  # db.chroma_manager
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api import routes_notes  # noqa: E402
+
+
+@pytest.fixture
+def client(temp_db, monkeypatch):
+    indexed = []
+    monkeypatch.setattr(routes_notes, "index_notes_in_chroma", lambda notes: indexed.extend(n["id"] for n in notes))
+    monkeypatch.setattr(routes_notes, "IMPORT_BATCH_SIZE", 1)
+    app = FastAPI()
+    app.include_router(routes_notes.router, prefix="/notes")
+    client = TestClient(app)
+    client.indexed = indexed
+    return client
+
+
+def _ndjson(*lines):
+    return "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+
+
+def test_import_indexes_notes_and_records_revisions(client, temp_db):
+    body = _ndjson({"title": "a", "content": "one"}, {"title": "b", "content": "two"})
+    response = client.post("/notes/import", content=body)
+    assert response.json() == {"imported": 2, "reindex_batches": 2}
+
+    notes = temp_db.get_all_notes()
+    assert sorted(client.indexed) == sorted(n["id"] for n in notes)
+    assert {n["indexing_status"] for n in notes} == {"completed"}
+    for note in notes:
+        assert [r["revision"] for r in temp_db.get_note_revisions(note["id"])] == [1]
+        assert temp_db.get_note_revision(note["id"], 1)["content"] == note["content"]
+
+
+def test_malformed_line_still_indexes_committed_batches(client, temp_db):
+    body = _ndjson({"title": "a", "content": "one"}, {"title": "b", "content": "two"}, "[1, 2]")
+    response = client.post("/notes/import", content=body)
+    assert response.status_code == 400
+    assert "Line 3" in response.json()["detail"]
+
+    notes = temp_db.get_all_notes()
+    assert len(notes) == 2
+    assert sorted(client.indexed) == sorted(n["id"] for n in notes)
+    assert {n["indexing_status"] for n in notes} == {"completed"}
@@ -0,0 +1,48 @@
+from db.migrations import MIGRATIONS, check_query_plans, get_schema_version
+
+
+def test_migrations_reach_latest_version(temp_db):
+    with temp_db.get_connection() as conn:
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+
+
+def test_new_tables_are_created_only_by_migrations(tmp_path, monkeypatch):
+    import db.database_manager as dbm
+
+    monkeypatch.setattr(dbm, "DB_PATH", str(tmp_path / "notes.db"))
+    dbm.init_db()
+    try:
+        with dbm.get_connection() as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        dbm.get_pool().close()
+    assert not tables & {
+        "codec_dictionaries", "chunk_manifests", "index_generations", "reindex_checkpoints",
+        "vector_outbox", "note_embeddings", "note_neighbors",
+    }
+
+
+def test_hot_queries_use_their_indexes(temp_db):
+    with temp_db.get_connection() as conn:
+        assert check_query_plans(conn) == []
+
+
+def test_upgrade_queues_existing_notes_for_the_vector_sync(tmp_path, monkeypatch):
+    import db.database_manager as dbm
+    from db import migrations
+
+    monkeypatch.setattr(dbm, "DB_PATH", str(tmp_path / "notes.db"))
+    dbm.init_db()
+    with monkeypatch.context() as m:
+        m.setattr(migrations, "MIGRATIONS", MIGRATIONS[:4])
+        migrations.run_migrations()
+    note_ids = [dbm.add_note(title=f"note {i}", input_source="test", content="text") for i in range(3)]
+
+    migrations.run_migrations()
+    try:
+        with dbm.get_connection() as conn:
+            queued = [row[0] for row in conn.execute("SELECT note_id FROM vector_outbox WHERE op = 'upsert'")]
+            assert sorted(queued) == note_ids  # once each, though migrations 5 and 6 both backfill
+            assert conn.execute("SELECT COUNT(*) FROM note_embeddings").fetchone()[0] == 0
+    finally:
+        dbm.get_pool().close()
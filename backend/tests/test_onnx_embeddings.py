@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("torch")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from db import onnx_embeddings  # noqa: E402
+from db.model_registry import DEFAULT_EMBEDDING_MODEL  # noqa: E402
+
+# Minimum cosine similarity between a text's PyTorch and ONNX vector
+MIN_COSINE = {False: 0.9999, True: 0.98}
+
+TEXTS = [
+    "The AUPR metric summarises the precision-recall curve for imbalanced data.",
+    "Self-attention lets every token attend to every other token in the sequence.",
+    "SQLite in WAL mode lets readers proceed while a single writer commits.",
+    "def fibonacci(n): return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)",
+    "Café, naïve, façade: accents should not break tokenisation.",
+    "",
+]
+TEXTS.append(" ".join(TEXTS) * 6)  # longer than MAX_SEQ_LENGTH tokens: truncated like the original
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float64)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    try:
+        model = sentence_transformers.SentenceTransformer(DEFAULT_EMBEDDING_MODEL, device="cpu")
+    except OSError as exc:  # not cached and the Hugging Face Hub is unreachable
+        pytest.skip(f"{DEFAULT_EMBEDDING_MODEL} unavailable: {exc}")
+    return _unit(model.encode(TEXTS))
+
+
+@pytest.fixture(scope="module")
+def onnx_model_dir(tmp_path_factory):
+    """Export into a temp dir, so the test covers torch.onnx.export and quantize_dynamic."""
+    original = onnx_embeddings.ONNX_MODEL_DIR
+    onnx_embeddings.ONNX_MODEL_DIR = str(tmp_path_factory.mktemp("onnx_models"))
+    yield onnx_embeddings.ONNX_MODEL_DIR
+    onnx_embeddings.ONNX_MODEL_DIR = original
+
+
+@pytest.mark.parametrize("quantize", [False, True], ids=["onnx", "onnx-int8"])
+def test_onnx_embeddings_match_sentence_transformers(reference, onnx_model_dir, quantize):
+    model = onnx_embeddings.OnnxEmbeddings(DEFAULT_EMBEDDING_MODEL, quantize=quantize)
+    vectors = _unit(model.embed_documents(TEXTS))
+
+    cosine = (vectors * reference).sum(axis=1)
+    assert cosine.min() >= MIN_COSINE[quantize], dict(zip(TEXTS, cosine.round(5)))
+    # Similarities between texts (what retrieval ranks by) barely move
+    assert np.abs(vectors @ vectors.T - reference @ reference.T).max() < (0.05 if quantize else 1e-3)
+    # Queries go through the same graph unbatched (int8 activations are quantized per batch)
+    assert float(_unit([model.embed_query(TEXTS[0])])[0] @ vectors[0]) > 0.999
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from db.quantized_index import QuantizedIndex
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, 8)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_index_written_before_persist_reopens_empty(tmp_path, dtype):
+    index = QuantizedIndex(str(tmp_path), dtype)
+    index.add(["a", "b"], _vectors(2), [1, 2])
+    # the process dies here, before persist()
+
+    reopened = QuantizedIndex(str(tmp_path), dtype)
+    assert len(reopened) == 0
+    reopened.add(["c"], _vectors(1, seed=1), [3])
+    reopened.persist()
+    assert len(QuantizedIndex(str(tmp_path), dtype)) == 1
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_persisted_index_reopens_with_its_rows(tmp_path, dtype):
+    vectors = _vectors(3)
+    index = QuantizedIndex(str(tmp_path), dtype)
+    index.add(["a", "b", "c"], vectors, [1, 1, 2])
+    index.persist()
+
+    reopened = QuantizedIndex(str(tmp_path), dtype)
+    assert len(reopened) == 3
+    ids = [chunk_id for chunk_id, _ in reopened.search(vectors[1], 1)]
+    assert ids == ["b"]
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.routes_style_profiles import router  # noqa: E402
+
+
+@pytest.fixture
+def client(temp_db):
+    app = FastAPI()
+    app.include_router(router, prefix="/style_profiles")
+    return TestClient(app)
+
+
+def test_delete_style_profiles(client):
+    profiles = [{"profile_id": "a", "tone": "dry"}, {"profile_id": "b", "tone": "warm"}]
+    assert client.post("/style_profiles/", json=profiles).status_code == 200
+    assert len(client.get("/style_profiles/").json()) == 2
+
+    response = client.delete("/style_profiles/")
+    assert response.status_code == 200, response.text
+    assert client.get("/style_profiles/").json() == []
@@ -15,17 +15,33 @@ def format_datetime(dt):
 # --- Base API URL ---
 API_BASE = "http://localhost:8000"
 
+# Columns needed by list views; full notes are fetched per-note on the detail page
+NOTE_LIST_FIELDS = "id,title,excerpt,tags,content_length,created_at,updated_at"
+NOTES_PAGE_SIZE = 200
+
+
+def fetch_notes_list():
+    """Fetch the lightweight note listing from the backend, following page cursors."""
+    notes, cursor = [], None
+    while True:
+        params = {"limit": NOTES_PAGE_SIZE, "fields": NOTE_LIST_FIELDS}
+        if cursor:
+            params["cursor"] = cursor
+        res = requests.get(f"{API_BASE}/notes/", params=params)
+        if res.status_code != 200:
+            return None
+        notes.extend(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return notes
+
 # ----------------------------- SESSION INIT --------------------------------
 def init_session_state():
     """Initialize session state variables"""
     if 'notes' not in st.session_state:
         # Fetch notes from backend
         try:
-            res = requests.get(f"{API_BASE}/notes")
-            if res.status_code == 200:
-                st.session_state.notes = res.json()
-            else:
-                st.session_state.notes = []
+            st.session_state.notes = fetch_notes_list() or []
         except requests.exceptions.ConnectionError:
             st.warning("⚠️ Backend not reachable — using local fallback notes.")
             st.session_state.notes = [
@@ -166,9 +182,9 @@ def delete_note(note_id):
 def refresh_notes():
     """Reload all notes from backend"""
     try:
-        res = requests.get(f"{API_BASE}/notes")
-        if res.status_code == 200:
-            st.session_state.notes = res.json()
+        notes = fetch_notes_list()
+        if notes is not None:
+            st.session_state.notes = notes
     except requests.exceptions.RequestException:
         st.error("⚠️ Failed to refresh notes from backend.")
 
@@ -215,12 +231,23 @@ def format_date(date_str):
     return date_obj.strftime("%b %d, %Y")
 
 
-def search_notes(query):
-    """Search notes locally"""
+def search_notes(query, limit=20):
+    """Keyword search via the backend full-text index; falls back to a local scan."""
+    try:
+        res = requests.get(
+            f"{API_BASE}/notes/search",
+            params={"q": query, "limit": limit, "prefix": True},
+        )
+        if res.status_code == 200:
+            return res.json()
+    except requests.exceptions.RequestException:
+        pass
+
     query = query.lower()
     results = []
     for note in st.session_state.notes:
-        if query in note['title'].lower() or query in note['content'].lower():
+        text = note.get('content') or note.get('excerpt') or ""
+        if query in (note['title'] or "").lower() or query in text.lower():
             results.append(note)
     return results
 
@@ -61,8 +61,19 @@ sort_map = {
 notes = get_notes_sorted(sort_by=sort_map[sort_by])
 
 
+def note_excerpt(note):
+    """List entries carry an `excerpt`; search hits still carry the full `content`."""
+    return note.get('excerpt') or note.get('content') or ""
+
+
+def note_length(note):
+    if note.get('content_length') is not None:
+        return note['content_length']
+    return len(note.get('content') or "")
+
+
 def semantic_search_notes(query):
-    response = requests.get(f"{API_BASE}/search", params={"query": query})
+    response = requests.get(f"{API_BASE}/search", params={"query": query, "mode": "hybrid"})
     data = response.json()
     return data["results"]
 
@@ -79,7 +90,7 @@ if search_query.strip():
             <div class="card" style="min-height: 220px; display: flex; flex-direction: column;">
                 <div style="flex: 1;">
                     <h3 style="margin: 0 0 8px 0; color: #0066cc; cursor: pointer;" onclick="alert('{note['id']}')">{note_title}</h3>
-                    <p style="color: #666666; margin: 8px 0; font-size: 0.95rem; line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden;">{note['content'][:150]}...</p>
+                    <p style="color: #666666; margin: 8px 0; font-size: 0.95rem; line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden;">{note_excerpt(note)[:150]}...</p>
                 </div>
                 <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 12px; padding-top: 12px; border-top: 1px solid #e0e0e0;">
                     <small style="color: #999999;">{format_date(note['updated_at'])}</small>
@@ -120,7 +131,7 @@ else:
                     <div class="card" style="min-height: 220px; display: flex; flex-direction: column;">
                         <div style="flex: 1;">
                             <h3 style="margin: 0 0 8px 0; color: #0066cc; cursor: pointer;" onclick="alert('{note['id']}')">{note_title}</h3>
-                            <p style="color: #666666; margin: 8px 0; font-size: 0.95rem; line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden;">{note['content'][:150]}...</p>
+                            <p style="color: #666666; margin: 8px 0; font-size: 0.95rem; line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden;">{note_excerpt(note)[:150]}...</p>
                         </div>
                         <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 12px; padding-top: 12px; border-top: 1px solid #e0e0e0;">
                             <small style="color: #999999;">{format_date(note['updated_at'])}</small>
@@ -151,13 +162,13 @@ else:
                     st.markdown(f"""
                     <div style="padding: 15px 0; border-bottom: 1px solid #e0e0e0;">
                         <h4 style="margin: 0 0 5px 0; color: #0066cc;">{note_title}</h4>
-                        <p style="margin: 5px 0; color: #666666; font-size: 0.9rem;">{note['content'][:100]}...</p>
+                        <p style="margin: 5px 0; color: #666666; font-size: 0.9rem;">{note_excerpt(note)[:100]}...</p>
                         <small style="color: #999999;">{format_date(note['updated_at'])}</small>
                     </div>
                     """, unsafe_allow_html=True)
 
                 with col2:
-                    st.markdown(f"<div style='padding: 15px 0; border-bottom: 1px solid #e0e0e0; text-align: right;'><small style='color: #0066cc; font-weight: 600;'>{len(note['content'])} chars</small></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div style='padding: 15px 0; border-bottom: 1px solid #e0e0e0; text-align: right;'><small style='color: #0066cc; font-weight: 600;'>{note_length(note)} chars</small></div>", unsafe_allow_html=True)
 
                 with col3:
                     if st.button("View", key=f"view_list_{note['id']}", use_container_width=True):
@@ -182,7 +193,7 @@ else:
         """, unsafe_allow_html=True)
 
     with stats_col2:
-        total_chars = sum(len(n['content']) for n in st.session_state.notes)
+        total_chars = sum(note_length(n) for n in st.session_state.notes)
         st.markdown(f"""
         <div style="background-color: #f8f9fa; border-radius: 8px; padding: 15px; text-align: center; border-left: 4px solid #0066cc;">
             <div style="font-size: 2rem; font-weight: 700; color: #0066cc;">{total_chars:,}</div>
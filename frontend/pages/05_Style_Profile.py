@@ -111,7 +111,12 @@ profile = style_profiles[0]
 #         st.error(" Backend not reachable while saving changes.")
 
 st.markdown("### Basic Info")
-profile["profile_id"] = st.text_input("Profile ID", value=profile.get("profile_id", ""))
+# The ID addresses the stored profile (PATCH /style_profiles/{id}), so it can't be renamed here
+profile["profile_id"] = st.text_input(
+    "Profile ID",
+    value=profile.get("profile_id", ""),
+    disabled=bool(profile.get("profile_id")),
+)
 profile["name"] = st.text_input("Profile Name", value=profile.get("name", ""))
 profile["user_persona"] = st.text_input("User Persona", value=profile.get("user_persona", ""))
 profile["description"] = st.text_area("Description", value=profile.get("description", ""), height=80)
@@ -230,10 +235,19 @@ profile["stylistic_devices"] = style_dev
 st.markdown("---")
 if st.button("Save Profile", use_container_width=True, type="primary"):
     try:
-        updated_profiles = [profile]
-        res = requests.put(f"{API_BASE}/style_profiles/", json=updated_profiles)
+        if profile.get("profile_id"):
+            # Merge-patch just this profile; version guards against overwriting a newer edit
+            res = requests.patch(
+                f"{API_BASE}/style_profiles/{profile['profile_id']}",
+                params={"version": profile.get("version")},
+                json=profile,
+            )
+        else:
+            res = requests.put(f"{API_BASE}/style_profiles/", json=[profile])
         if res.status_code == 200:
             success_message("Style profile updated successfully!")
+        elif res.status_code == 409:
+            st.error("This profile was changed elsewhere — reload the page and try again.")
         else:
             st.error(f"Failed to update profile: {res.text}")
     except requests.exceptions.RequestException: